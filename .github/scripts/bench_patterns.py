@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""Hold every guard regex to a time budget per MiB on synthetic worst cases.
+
+bench_guards.py asks whether a faster engine still gives the same answers on
+the real tree. This asks the other question: can any single pattern be made
+slow? The real tree is small and friendly, so a careless edit that lets a
+pattern backtrack -- a quantifier that can hand characters to its neighbour,
+an unanchored start inside a long run -- passes every check there and only
+shows up the day a PR carries the wrong shape of line.
+
+Each pattern runs alone, the way its guard applies it (an identifier pattern
+over a whole buffer in MULTILINE mode, as the Scanner's gate does; a route
+pattern line by line), over three corpora generated here from a fixed seed:
+
+    small-yaml      thousands of small manifests
+    dashboard-json  a few multi-MiB dashboards, one minified onto a single line
+    adversarial     near-miss runs built to make a backtracking pattern
+                    quadratic: endless device-hostname chains, long
+                    dotted-quad and hex-colon runs, long hyphenated words
+                    before a dot, and list items padded with whitespace
+
+The run fails if any pattern takes more than --budget seconds per MiB of any
+corpus. Linear patterns clear the default by one to three orders of magnitude
+and a quadratic one misses it by as much, so the verdict does not depend on
+the machine. INTERNAL_DOMAIN_RE, when set, is budgeted as "internal domain";
+like everything else here, only names and numbers are printed.
+
+--json FILE (or - for stdout) writes the full results, with the commit and
+time, for trend tracking.
+
+Run locally:  python3 .github/scripts/bench_patterns.py [--scale 0.2] [--json -]
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import random
+import re
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from typing import NamedTuple
+
+import check_internal_identifiers as cii
+import check_route_hostname_pairs as crp
+import hostname_inventory as hinv
+import route_structure as rs
+
+MIB = 1024 * 1024
+
+# Worst acceptable seconds per MiB for one pattern on one corpus.
+BUDGET_SECONDS_PER_MIB = 0.5
+
+# Long enough that a quadratic pattern blows the budget many times over,
+# short enough that it still finishes in seconds rather than hours.
+ADVERSARIAL_LINE_BYTES = 16 * 1024
+
+
+class Corpus(NamedTuple):
+    """A named list of documents, each scanned as one buffer."""
+
+    name: str
+    documents: list[str]
+
+    @property
+    def size(self) -> int:
+        """Return the corpus size in bytes."""
+        return sum(len(doc.encode()) for doc in self.documents)
+
+
+class Probe(NamedTuple):
+    """One pattern, and how to apply it to a document: *run* returns the match count."""
+
+    name: str
+    run: Callable[[str], int]
+
+
+def buffer_probe(pattern: re.Pattern) -> Callable[[str], int]:
+    """Apply *pattern* to a whole document in MULTILINE mode, as Scanner's gate does."""
+    gate = re.compile(pattern.pattern, pattern.flags | re.MULTILINE)
+    return lambda doc: sum(1 for _ in gate.finditer(doc))
+
+
+def line_probe(apply: Callable[[str], object]) -> Callable[[str], int]:
+    """Apply *apply* to every line of a document (no prefilter: the worst case); count the hits."""
+    return lambda doc: sum(1 for line in doc.split("\n") if apply(line))
+
+
+def probes() -> list[Probe]:
+    """Every regex the two guards (and the hostname inventory) run."""
+    identifier = {**cii.PATTERNS, **cii.PROSE_PATTERNS, **cii.internal_domain_pattern()}
+    found = [Probe(f"identifier: {kind}", buffer_probe(pattern)) for kind, pattern in identifier.items()]
+    found += [Probe(f"hint: {kind}", buffer_probe(hint)) for kind, hint in cii.HINTS.items()]
+    found += [
+        Probe("route: HOSTNAME_RE", line_probe(crp.HOSTNAME_RE.search)),
+        Probe("route: LIST_ITEM_RE", line_probe(rs.LIST_ITEM_RE.match)),
+        Probe("inventory: HOST_RE", line_probe(hinv.HOST_RE.findall)),
+    ]
+    return found
+
+
+def small_yamls(rng: random.Random, count: int) -> list[str]:
+    """Small HelmRelease-shaped manifests with hostnames, images and the odd address-like value."""
+    words = ["media", "home", "sync", "api", "web", "db", "cache", "proxy", "auth", "docs"]
+    docs = []
+    for n in range(count):
+        name = f"{rng.choice(words)}-{rng.choice(words)}{n}"
+        octets = ".".join(str(rng.randint(0, 255)) for _ in range(4))
+        digest = "".join(rng.choice("0123456789abcdef") for _ in range(64))
+        docs.append(
+            f"---\napiVersion: helm.toolkit.fluxcd.io/v2\nkind: HelmRelease\nmetadata:\n  name: {name}\n"
+            f"spec:\n  values:\n    controllers:\n      {name}:\n        containers:\n          app:\n"
+            f"            image:\n              repository: ghcr.io/example/{name}\n"
+            f"              tag: {rng.randint(1, 9)}.{rng.randint(0, 40)}.{rng.randint(0, 9)}@sha256:{digest}\n"
+            f"            env:\n              TZ: Europe/London\n              UPSTREAM: http://{octets}:8080\n"
+            f'    route:\n      app:\n        hostnames:\n          - "{name}.${{SECRET_DOMAIN}}"\n'
+            f"          - {name}.${{SECRET_INTERNAL_DOMAIN}}\n"
+            f"    service:\n      app:\n        ports:\n          http:\n            port: {rng.randint(1024, 65535)}\n"
+        )
+    return docs
+
+
+def dashboards(rng: random.Random, count: int, mib: float) -> list[str]:
+    """Grafana-shaped dashboards of about *mib* MiB each; the first is minified onto one line."""
+    metrics = ["container_cpu_usage_seconds_total", "node_network_receive_bytes_total", "kube_pod_info"]
+    docs = []
+    for n in range(count):
+        panels = []
+        size = 0
+        while size < mib * MIB:
+            panel = {
+                "id": len(panels),
+                "title": f"panel {len(panels)} of {rng.choice(metrics)}",
+                "gridPos": {"h": rng.randint(4, 12), "w": rng.randint(6, 24), "x": 0, "y": len(panels)},
+                "targets": [
+                    {
+                        "expr": f'sum(rate({rng.choice(metrics)}{{namespace=~"$namespace"}}[5m])) by (pod)',
+                        "legendFormat": "{{pod}}",
+                        "refId": "A",
+                    }
+                ],
+                "fieldConfig": {"defaults": {"unit": "bytes", "color": {"mode": "palette-classic"}}},
+            }
+            panels.append(panel)
+            size += 400
+        separators = (",", ":") if n == 0 else None
+        docs.append(
+            json.dumps(
+                {"title": f"dashboard {n}", "panels": panels}, indent=None if n == 0 else 2, separators=separators
+            )
+        )
+    return docs
+
+
+def adversarial_lines(rng: random.Random, mib: float) -> list[str]:
+    """Near-miss runs of ADVERSARIAL_LINE_BYTES each, built from parts so no real value is spelled out."""
+    half = ADVERSARIAL_LINE_BYTES // 2
+    quarter = ADVERSARIAL_LINE_BYTES // 4
+    shapes: list[Callable[[], str]] = [
+        lambda: "-".join(["cr"] + ["a"] * half),  # device hostname: one endless segment chain
+        lambda: "-".join(["cr", "talos"] * (ADVERSARIAL_LINE_BYTES // 9)),  # the excluded prefix, repeated
+        lambda: ".".join(map(str, (192, 168) * (ADVERSARIAL_LINE_BYTES // 8))),  # a dotted-quad run
+        lambda: ".".join(map(str, (100, 64) * (ADVERSARIAL_LINE_BYTES // 7))),
+        lambda: ".".join(str(rng.randint(0, 255)) for _ in range(quarter)),
+        lambda: ":".join(["ab"] * (ADVERSARIAL_LINE_BYTES // 3)),  # a hex-colon run no MAC can end
+        lambda: "-".join(["a"] * half) + " x" + ".lan",  # a long word that is not the one before the dot
+        lambda: "Z" + ("a" * 40 + "-" * 40) * (ADVERSARIAL_LINE_BYTES // 80) + " x" + ".lan",  # ...in long blocks
+        lambda: ".".join(["a"] * half) + "${SECRET_OTHER}",  # a hostname-shaped run before the wrong variable
+        lambda: "    -" + " " * ADVERSARIAL_LINE_BYTES + "${SECRET_OTHER}",  # a list item padded with spaces
+        lambda: "    - " + "${SECRET_DOMAIN}" * (ADVERSARIAL_LINE_BYTES // 16) + " x",
+    ]
+    lines = []
+    while sum(map(len, lines)) < mib * MIB:
+        lines += [shape() for shape in shapes]
+    return lines
+
+
+def corpora(scale: float, seed: int = 0) -> list[Corpus]:
+    """Build the three corpora; *scale* 1.0 is about 3 + 12 + 1 MiB."""
+    rng = random.Random(seed)
+    return [
+        Corpus("small-yaml", small_yamls(rng, max(1, int(3000 * scale)))),
+        Corpus("dashboard-json", dashboards(rng, 3, 4 * scale)),
+        # One document per line, so a per-line pattern and a buffer pattern see the same runs.
+        Corpus("adversarial", adversarial_lines(rng, scale)),
+    ]
+
+
+def measure(probe: Probe, corpus: Corpus, repeat: int, budget: float) -> dict:
+    """Time *probe* over *corpus* (best of *repeat*, stopping early once over budget)."""
+    mib = corpus.size / MIB
+    best = float("inf")
+    matches = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        matches = sum(probe.run(doc) for doc in corpus.documents)
+        best = min(best, time.perf_counter() - started)
+        if best > budget * mib:
+            break
+    return {
+        "pattern": probe.name,
+        "corpus": corpus.name,
+        "seconds": round(best, 6),
+        "mib_per_second": round(mib / best, 2) if best else None,
+        "seconds_per_mib": round(best / mib, 6),
+        "matches": matches,
+        "over_budget": best > budget * mib,
+    }
+
+
+def git_head() -> str | None:
+    """Return the commit being measured, or None outside a checkout."""
+    proc = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=False)
+    return proc.stdout.strip() or None
+
+
+def main() -> int:
+    """Run every probe on every corpus; exit 1 if any pattern is over budget."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=BUDGET_SECONDS_PER_MIB, help="max seconds per MiB")
+    parser.add_argument("--scale", type=float, default=1.0, help="corpus size factor (1.0 is about 16 MiB)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is reported")
+    parser.add_argument("--json", metavar="FILE", help="write the results as JSON to FILE (- for stdout)")
+    args = parser.parse_args()
+
+    built = corpora(args.scale)
+    log = sys.stderr if args.json == "-" else sys.stdout
+    names = [corpus.name for corpus in built]
+    print(f"{'MiB/s':<48}" + "".join(f"{name:>16}" for name in names), file=log)
+    print(f"{'(corpus MiB)':<48}" + "".join(f"{corpus.size / MIB:>16.1f}" for corpus in built), file=log)
+    results = []
+    for probe in probes():
+        row = [measure(probe, corpus, args.repeat, args.budget) for corpus in built]
+        results += row
+        cells = "".join(f"{r['mib_per_second'] or 0:>15.1f}{'!' if r['over_budget'] else ' '}" for r in row)
+        print(f"{probe.name:<48}{cells}", file=log)
+
+    over = [r for r in results if r["over_budget"]]
+    for r in over:
+        print(f"OVER BUDGET: {r['pattern']} on {r['corpus']}: {r['seconds_per_mib']:.3f} s/MiB", file=log)
+    if not over:
+        print(f"OK -- every pattern is within {args.budget} s/MiB on every corpus.", file=log)
+
+    if args.json:
+        document = {
+            "commit": git_head(),
+            "generated_at": datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "budget_seconds_per_mib": args.budget,
+            "corpora": {corpus.name: {"documents": len(corpus.documents), "bytes": corpus.size} for corpus in built},
+            "results": results,
+            "ok": not over,
+        }
+        text = json.dumps(document, indent=2)
+        if args.json == "-":
+            print(text)
+        else:
+            with open(args.json, "w", encoding="utf-8") as handle:
+                handle.write(text + "\n")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,6 +20,33 @@ rebaseWhen:conflicted the stale FAILURE check-run then blocked Renovate's
 self-merge forever. Main's own state stays covered by the push and schedule
 runs.)
 
+With --rev REV the tree at REV is read straight from the git object store
+through one `git cat-file --batch` pipe, so a bare clone or the PR merge ref
+can be scanned without materialising a worktree.
+
+Files that cannot carry a readable identifier are dropped before any regex
+work: binaries (a NUL in the first block, git's own heuristic), files
+.gitattributes marks `-diff` or `linguist-generated` (e.g. mise.lock), and
+anything over --max-bytes. The attributes are read at --diff-base when there
+is one, so a change cannot opt its own files out by editing .gitattributes.
+Attribute and size skips are each named on stderr so the skip is never
+silent. The run ends with a count of what was skipped.
+
+With --diff-base REV --diff-lines only the lines ADDED since REV are scanned,
+streamed from `git diff -U0`: a one-line edit to a large helmrelease is judged
+on that line, not on pre-existing content elsewhere in the file.
+
+Large scans shard the file list across --jobs worker processes (default: CPU
+count), balanced by file size; violations are merged back in path order, so the
+output is identical to a serial run. A scan too small to fill one
+MIN_SHARD_BYTES shard per worker uses fewer workers, down to none.
+
+--format json|sarif swaps the human output for a machine-readable report (see
+scan_report.py): each violation's path, line and column span -- never the
+matched text, and no span end for the internal domain -- plus instrumentation
+(wall time, files/bytes scanned, skip and cache counters, seconds per pattern)
+so a slow guard shows where its time went. SARIF loads into code scanning.
+
 The allowlist is the authoritative list of "accepted functional configs" -- each
 entry says why the identifier has to live there. To template one out of git later,
 move its value to the cluster-secrets 1Password item (Flux substitutes ${VAR} the
@@ -32,6 +59,13 @@ nothing linted them, so a LAN IP and an AI session link reached history in #3803
 Prose has no file path, so the ALLOWLIST does not apply; the BENIGN list still
 does, and the prose-only PROSE_PATTERNS are added.
 
+--serve keeps all of this warm in a daemon on a Unix socket -- compiled
+patterns, and with --cache the blob results -- for scan_daemon.py, a thin
+client for git hooks that falls back to a local run whenever the daemon is
+absent. The daemon restarts itself when this script changes and recompiles
+when INTERNAL_DOMAIN_RE does. Positional PATHs limit a scan to those tracked
+files.
+
 Run locally:  python3 .github/scripts/check_internal_identifiers.py
               python3 .github/scripts/check_internal_identifiers.py --text-file -
 """
@@ -39,14 +73,111 @@ Run locally:  python3 .github/scripts/check_internal_identifiers.py
 from __future__ import annotations
 
 import argparse
+import functools
+import hashlib
+import heapq
+import json
 import os
 import re
-import subprocess
 import sys
-from fnmatch import fnmatch
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, TextIO
+
+import scan_daemon
+from git_tree import (
+    BlobReader,
+    added_lines,
+    blob_ids,
+    changed_files,
+    git_path,
+    skipped_by_attributes,
+    tracked_files,
+    tree_entries,
+)
+from path_matcher import PathMatcher
+from scan_report import Violation, build_report, to_sarif
 
 SELF_PATH = ".github/scripts/check_internal_identifiers.py"
 
+# Smallest shard worth a worker process for --jobs. Starting the pool and
+# pickling results back costs tens of milliseconds, and the scanner gets
+# through about 40 MiB/s, so a shard must hold seconds' worth of scanning
+# before it pays. Anything smaller -- this whole tree, and every PR's
+# --diff-base scope -- stays in-process however many jobs are allowed.
+MIN_SHARD_BYTES = 8 * 1024 * 1024
+
+# Files over this many bytes are reported and skipped rather than scanned
+# (--max-bytes). Nothing tracked comes near it; it exists so a vendored blob
+# cannot quietly dominate the run.
+MAX_SCAN_BYTES = 8 * 1024 * 1024
+
+# git's own binary heuristic: a NUL byte in the first 8000 bytes.
+BINARY_SNIFF_BYTES = 8000
+
+# Bump when the shape of a cached scan result changes; the fingerprint covers
+# everything else that can change a result (see ScanCache.fingerprint).
+CACHE_VERSION = 2
+CACHE_NAME = "identifier-scan-cache.json"
+
+# Kinds whose match must never be echoed, even as a span: the internal-domain
+# regex arrives out-of-band precisely so the public CI log never shows it.
+SECRET_KINDS = frozenset({"internal domain"})
+
+# internal_hostname_pattern() proves runs of up to 2**HOSTNAME_RUN_LEVELS - 1
+# characters in linear time. A longer run is let through and rescanned, which
+# costs time but never changes a match.
+HOSTNAME_RUN_LEVELS = 21
+
+
+def ends_run_after(block: str, before: str, after: str) -> str:
+    r"""Regex: the text just behind here is a run of *block* with *before* in front, and *after* is next.
+
+    Python's lookbehinds are fixed-width, so the run length is bracketed by
+    powers of two: for [lo, 2*lo) the lookbehind jumps back 2*lo characters and
+    a lookahead searches forward from there for before + block{lo,2*lo-1} +
+    after. Nothing but this run fits that window at that length. Each level is
+    only tried once the run is known to reach lo, so a position costs about as
+    much as the run behind it.
+    """
+    chain = ""
+    for level in reversed(range(HOSTNAME_RUN_LEVELS)):
+        lo, hi = 2**level, 2 ** (level + 1)
+        proof = rf"(?<=(?=[\s\S]{{0,{lo - 1}}}?{before}{block}{{{lo},{hi - 1}}}{after})[\s\S]{{{hi}}})"
+        chain = rf"(?<={block}{{{lo}}})(?:{proof}|{chain})" if chain else rf"(?<={block}{{{lo}}}){proof}"
+    return chain
+
+
+def internal_hostname_pattern() -> re.Pattern:
+    r"""Compile `\b[a-z0-9_-]+\.(?:lan|internal)\b` so it starts once per name.
+
+    The plain pattern starts at every word boundary inside a run of
+    [a-z0-9_-] -- each hyphen of "a-b-c-..." -- and rescans the rest of the run
+    from each one, which is quadratic (see bench_patterns.py). Only the run's
+    FIRST boundary can ever match: a later start reaches the same end of the
+    run, so it fails where the first one failed, and if the first one matched
+    the run is already consumed.
+
+    So a start is refused only when it is provably a later one: a name
+    character after hyphens that follow a word character, or a hyphen after
+    name characters that follow a non-word character. After an uppercase or
+    non-ASCII letter -- a word character, but not a name character -- the run's
+    first boundary is its first hyphen, which is kept; so is a hyphen right
+    after a previous match's `.lan`/`.internal`, where that match's run
+    resumes. bench_guards.py checks this against the plain pattern.
+    """
+    name = "[a-z0-9_]"
+    after_hyphens = ends_run_after("-", r"\w", name)
+    after_names = ends_run_after(name, r"[^\w]", "-")
+    return re.compile(
+        rf"\b(?:(?<!\w-)(?={name})(?!{after_hyphens})"
+        rf"|(?<![^\w]{name})(?=-)(?:(?<=\.lan)|(?<=\.internal)|(?!{after_names})))"
+        r"[a-z0-9_-]+\.(?:lan|internal)\b"
+    )
+
+
 # --- Patterns that must not appear in tracked files (outside the allowlist) ---
 # NOTE: patterns are kept GENERIC on purpose -- this script is public, so it must
 # not itself enumerate device models or device-class names (that would re-disclose
@@ -69,7 +200,26 @@ PATTERNS: dict[str, re.Pattern] = {
     "device hostname (cr)": re.compile(r"(?<![a-z0-9])cr-(?!talos(?:-|\b))[a-z][a-z0-9]*(?:-[a-z0-9]+)*"),
     "device hostname (sw)": re.compile(r"(?<![a-z0-9])sw-(?:main|comms)-[a-z0-9]+"),
     "MAC address": re.compile(r"(?<![0-9a-fA-F:])(?:[0-9a-fA-F]{2}:){5}[0-9a-fA-F]{2}(?![0-9a-fA-F:])"),
-    "internal hostname": re.compile(r"\b[a-z0-9_-]+\.(?:lan|internal)\b"),
+    # `\b[a-z0-9_-]+\.(?:lan|internal)\b`, built so it never rescans a name
+    # (see internal_hostname_pattern).
+    "internal hostname": internal_hostname_pattern(),
+}
+
+# Cheap necessary conditions for PATTERNS, keyed the same way. Every match of a
+# pattern contains a match of its hint, and each hint leads with a literal, so
+# CPython's re can run its fast literal search over a whole file instead of
+# trying a lookbehind at every offset. Scanner uses them to reject clean text
+# before the real pattern runs; a kind with no hint is simply run unfiltered.
+# If you change a pattern, change (or drop) its hint with it --
+# bench_guards.py checks engine parity on the real tree.
+HINTS: dict[str, re.Pattern] = {
+    "LAN IP": re.compile(r"10\.32\.|192\.168\.|172\."),
+    "tailnet IP (CGNAT)": re.compile(r"100\."),
+    "node name": re.compile(r"cr-talos-"),
+    "device hostname (cr)": re.compile(r"cr-"),
+    "device hostname (sw)": re.compile(r"sw-(?:main|comms)-"),
+    "MAC address": re.compile(r":[0-9a-fA-F]{2}:"),
+    "internal hostname": re.compile(r"\.(?:lan|internal)"),
 }
 
 # Prose-only patterns (--text-file). These are not identifiers a tracked file
@@ -122,9 +272,10 @@ ALLOWLIST: dict[str, str] = {
     "kubernetes/apps/observability/snmp-exporter/app/configmap.yaml": "SNMP module config",
     "kubernetes/apps/observability/snmp-exporter/app/helmrelease.yaml": "SNMP scrape target",
 }
+ALLOWLISTED = PathMatcher(ALLOWLIST)
 
 
-def internal_domain_pattern() -> dict[str, re.Pattern]:
+def internal_domain_pattern(raw: str | None = None) -> dict[str, re.Pattern]:
     """Return the optional internal-zone pattern, supplied out-of-band.
 
     PATTERNS above are deliberately generic because this script is PUBLIC --
@@ -132,9 +283,9 @@ def internal_domain_pattern() -> dict[str, re.Pattern]:
     exists to keep out of git. So the regex arrives at runtime instead, via
     INTERNAL_DOMAIN_RE: a repository secret in CI, a gitignored .mise.local.toml
     locally. Unset (any fresh clone), the check simply skips -- every other
-    pattern still applies.
+    pattern still applies. *raw* overrides the environment.
     """
-    raw = os.environ.get("INTERNAL_DOMAIN_RE", "").strip()
+    raw = os.environ.get("INTERNAL_DOMAIN_RE", "").strip() if raw is None else raw
     if not raw:
         return {}
     try:
@@ -144,22 +295,191 @@ def internal_domain_pattern() -> dict[str, re.Pattern]:
         raise SystemExit(2) from exc
 
 
-def allowlisted(path: str) -> bool:
-    """Return True if the path matches an accepted-functional-config glob."""
-    return any(fnmatch(path, glob) or path.startswith(glob.rstrip("*")) for glob in ALLOWLIST)
+class Hit(NamedTuple):
+    """One identifier in a buffer: 1-based line, kind, and 0-based column span."""
+
+    line: int
+    kind: str
+    start: int
+    end: int
 
 
-def tracked_files() -> list[str]:
-    """List git-tracked files, excluding the local-only .private/ tree."""
-    out = subprocess.check_output(["git", "ls-files"], text=True)
-    return [f for f in out.splitlines() if not f.startswith(".private/")]
+class Scanner:
+    """A pattern set compiled once and applied to whole buffers.
 
+    The naive loop ran every pattern over every line -- (#patterns x #lines)
+    regex passes on a full scan, nearly all of them over clean lines. Here each
+    kind is first gated against the whole buffer (hint, then the pattern
+    itself in MULTILINE mode so ``^``/``$`` still mean line boundaries), which
+    rejects a clean file in a handful of C-level searches. Only the kinds that
+    hit are re-run line by line, so kind attribution, BENIGN filtering and the
+    one-violation-per-kind-per-line rule are exactly as before.
 
-def changed_files(base: str) -> list[str]:
-    """List tracked files changed between *base* and HEAD (deletions excluded)."""
-    out = subprocess.check_output(["git", "diff", "--name-only", "--diff-filter=d", base, "HEAD"], text=True)
-    tracked = set(tracked_files())
-    return [f for f in out.splitlines() if f in tracked]
+    Time spent per kind (gate and line passes together) accumulates in
+    ``seconds`` for --format json/sarif instrumentation.
+    """
+
+    def __init__(self, patterns: dict[str, re.Pattern]) -> None:
+        self.patterns = patterns
+        self.hints = {kind: HINTS.get(kind) for kind in patterns}
+        self.gates = {kind: re.compile(pat.pattern, pat.flags | re.MULTILINE) for kind, pat in patterns.items()}
+        self.seconds: Counter[str] = Counter()
+
+    def candidate_kinds(self, text: str) -> list[str]:
+        """Return the kinds that can match somewhere in *text*, in pattern order."""
+        kinds: list[str] = []
+        for kind, gate in self.gates.items():
+            hint = self.hints[kind]
+            started = time.perf_counter()
+            if (hint is None or hint.search(text)) and gate.search(text):
+                kinds.append(kind)
+            self.seconds[kind] += time.perf_counter() - started
+        return kinds
+
+    def line_hits(self, line: str, kinds: Iterable[str] | None = None) -> list[tuple[str, int, int]]:
+        """Return (kind, start, end) of the first non-benign match of each kind in *line*."""
+        found: list[tuple[str, int, int]] = []
+        for kind in self.patterns if kinds is None else kinds:
+            hint = self.hints[kind]
+            if hint is not None and not hint.search(line):
+                continue  # the common case; too cheap to be worth a clock read
+            started = time.perf_counter()
+            for match in self.patterns[kind].finditer(line):
+                if not any(b.search(match.group(0)) for b in BENIGN):
+                    found.append((kind, match.start(), match.end()))
+                    break
+            self.seconds[kind] += time.perf_counter() - started
+        return found
+
+    def line_kinds(self, line: str, kinds: Iterable[str] | None = None) -> list[str]:
+        """Return each kind with a non-benign match in *line* (at most once per kind)."""
+        return [kind for kind, _start, _end in self.line_hits(line, kinds)]
+
+    def scan(self, text: str) -> list[Hit]:
+        """Return a Hit for every violation in *text*."""
+        kinds = self.candidate_kinds(text)
+        if not kinds:
+            return []
+        return [
+            Hit(lineno, *found)
+            for lineno, line in enumerate(text.split("\n"), 1)
+            for found in self.line_hits(line, kinds)
+        ]
+
+
+@functools.lru_cache(maxsize=8)
+def compiled_scanner(domain_re: str, prose: bool = False) -> Scanner:
+    """Return the Scanner for one INTERNAL_DOMAIN_RE value, compiled once per process.
+
+    Keyed on the raw value, so a --serve daemon recompiles the moment a client
+    arrives with a different regex and otherwise never compiles twice.
+    """
+    return Scanner({**PATTERNS, **(PROSE_PATTERNS if prose else {}), **internal_domain_pattern(domain_re)})
+
+
+def current_scanner(prose: bool = False) -> Scanner:
+    """Return the (cached) Scanner for the current environment, with its timers reset."""
+    scanner = compiled_scanner(os.environ.get("INTERNAL_DOMAIN_RE", "").strip(), prose)
+    scanner.seconds.clear()
+    return scanner
+
+
+class ScanCache:
+    """Persistent scan results keyed by git blob ID.
+
+    Most tracked files are byte-identical between nightly runs, and a blob ID
+    names the content exactly, so a blob scanned once under the same pattern set
+    never needs reading again. The whole cache is tied to a fingerprint of
+    PATTERNS, HINTS, BENIGN, ALLOWLIST, INTERNAL_DOMAIN_RE and this file's own
+    source: change any of them -- or how a line is scanned -- and the next run
+    starts empty instead of trusting stale verdicts. Entries are
+    kept in least-recently-used order and trimmed to *max_entries* on save.
+    Only line, kind and column span are stored -- never the matched text.
+    """
+
+    def __init__(self, path: str, patterns: dict[str, re.Pattern], max_entries: int) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.fingerprint = self.fingerprint_of(patterns)
+        self.hits = self.misses = 0
+        self.entries: dict[str, list[Hit]] = {}
+        try:
+            with open(path, encoding="utf-8") as handle:
+                stored = json.load(handle)
+        except (OSError, ValueError):
+            return
+        if isinstance(stored, dict) and stored.get("fingerprint") == self.fingerprint:
+            self.entries = {blob: [Hit(*hit) for hit in hits] for blob, hits in stored["entries"].items()}
+
+    @staticmethod
+    def fingerprint_of(patterns: dict[str, re.Pattern]) -> str:
+        """Hash everything that can change a blob's verdict."""
+        material = {
+            "version": CACHE_VERSION,
+            "patterns": [[kind, pat.pattern, pat.flags] for kind, pat in patterns.items()],
+            "hints": [[kind, pat.pattern, pat.flags] for kind, pat in HINTS.items()],
+            "benign": [pat.pattern for pat in BENIGN],
+            "allowlist": sorted(ALLOWLIST),
+            "source": source_digest(),
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+    def get(self, blob: str | None) -> list[Hit] | None:
+        """Return the cached result for *blob* (refreshing its recency), or None."""
+        found = self.entries.pop(blob, None) if blob else None
+        if found is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries[blob] = found
+        return found
+
+    def put(self, blob: str, found: list[Hit]) -> None:
+        """Record the scan result for *blob* as most recently used."""
+        self.entries.pop(blob, None)
+        self.entries[blob] = found
+
+    def save(self) -> None:
+        """Write the cache atomically, evicting the least recently used entries."""
+        if len(self.entries) > self.max_entries:
+            self.entries = dict(list(self.entries.items())[len(self.entries) - self.max_entries :])
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as handle:
+            json.dump({"fingerprint": self.fingerprint, "entries": self.entries}, handle, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def summary(self) -> str:
+        """One line of hit/miss counts for the end of the run."""
+        return f"scan cache: {self.hits} hit, {self.misses} miss, {len(self.entries)} entries"
+
+
+# Loaded caches by (file, fingerprint): a --serve daemon reuses them across
+# requests instead of re-reading the JSON file every time.
+OPEN_CACHES: dict[tuple[str, str], ScanCache] = {}
+
+
+def open_cache(path: str, patterns: dict[str, re.Pattern], max_entries: int) -> ScanCache:
+    """Return the ScanCache for *path* under *patterns*, loading it from disk once per process."""
+    key = (os.path.abspath(path), ScanCache.fingerprint_of(patterns))
+    cache = OPEN_CACHES.get(key)
+    if cache is None:
+        cache = OPEN_CACHES[key] = ScanCache(key[0], patterns, max_entries)
+    cache.max_entries = max_entries
+    cache.hits = cache.misses = 0
+    return cache
+
+
+@functools.cache
+def source_digest() -> str:
+    """Return the SHA-256 of this file, so a change to the scanning code invalidates the cache."""
+    with open(os.path.abspath(__file__), "rb") as handle:
+        return hashlib.sha256(handle.read()).hexdigest()
+
+
+def allowlisted(path: str) -> bool:
+    """Return True if the path matches an accepted-functional-config glob."""
+    return ALLOWLISTED(path)
 
 
 def format_violation(kind: str, lineno: int, line: str) -> str:
@@ -170,38 +490,47 @@ def format_violation(kind: str, lineno: int, line: str) -> str:
     string the check exists to suppress. Secret masking does not help here: it
     masks the regex, not the domain that regex matched.
     """
-    if kind == "internal domain":
+    if kind in SECRET_KINDS:
         return f"  line {lineno}: {kind} (content withheld -- it is the leak)"
     return f"  line {lineno}: {kind}\n    {line.strip()[:120]}"
 
 
+def prose_lines(handle: TextIO, strip_git_comments: bool) -> Iterator[tuple[int, str]]:
+    """Yield (line number, line) from a message as it is read, one line at a time.
+
+    With *strip_git_comments*, '#' lines are dropped and reading stops at the
+    SCISSORS marker, so the staged diff of a `git commit --verbose` message is
+    never read, let alone held. Lines end at \n, \r\n or \r, as git counts them.
+    """
+    for lineno, raw in enumerate(handle, 1):
+        line = raw.rstrip("\r\n")
+        if strip_git_comments:
+            if SCISSORS.match(line):
+                return
+            if line.startswith("#"):
+                continue
+        yield lineno, line
+
+
+def prose_violations(handle: TextIO, strip_git_comments: bool) -> list[str]:
+    """Return the formatted violations in a commit message or PR body, scanning as it streams."""
+    scanner = current_scanner(prose=True)
+    return [
+        format_violation(kind, lineno, line)
+        for lineno, line in prose_lines(handle, strip_git_comments)
+        for kind in scanner.line_kinds(line)
+    ]
+
+
 def scan_text(source: str, strip_git_comments: bool) -> int:
     """Scan a commit message or PR body and fail (exit 1) on any identifier."""
     if source == "-":
-        raw = sys.stdin.read()
+        violations = prose_violations(sys.stdin, strip_git_comments)
+        while sys.stdin.read(1 << 16):
+            pass  # drain what follows the scissors, so the writer never sees a broken pipe
     else:
         with open(source, encoding="utf-8", errors="ignore") as handle:
-            raw = handle.read()
-
-    numbered = list(enumerate(raw.splitlines(), 1))
-    if strip_git_comments:
-        kept: list[tuple[int, str]] = []
-        for lineno, line in numbered:
-            if SCISSORS.match(line):
-                break
-            if not line.startswith("#"):
-                kept.append((lineno, line))
-        numbered = kept
-
-    patterns = {**PATTERNS, **PROSE_PATTERNS, **internal_domain_pattern()}
-    violations: list[str] = []
-    for lineno, line in numbered:
-        for kind, pat in patterns.items():
-            for match in pat.finditer(line):
-                if any(b.search(match.group(0)) for b in BENIGN):
-                    continue
-                violations.append(format_violation(kind, lineno, line))
-                break
+            violations = prose_violations(handle, strip_git_comments)
 
     if violations:
         print("Internal identifiers found in commit message / PR body:\n")
@@ -219,36 +548,265 @@ def scan_text(source: str, strip_git_comments: bool) -> int:
     return 0
 
 
-def scan_files(paths: list[str]) -> list[str]:
-    """Return one 'path:line: kind' string per non-allowlisted identifier found."""
-    patterns = {**PATTERNS, **internal_domain_pattern()}
-    violations: list[str] = []
+def decode_blob(data: bytes) -> str:
+    """Decode raw file bytes exactly as a text-mode open(errors="ignore") read does."""
+    return data.decode("utf-8", errors="ignore").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def read_file(path: str) -> bytes:
+    """Return the raw bytes of a worktree file."""
+    with open(path, "rb") as handle:
+        return handle.read()
+
+
+def scan_shard(paths: list[str], blobs: dict[str, str] | None = None) -> tuple[dict[str, list[Hit]], Counter[str]]:
+    """Scan one --jobs shard in a worker process, keyed by path for the merge.
+
+    With *blobs* (path -> blob ID) contents come from the object store through
+    one BlobReader instead of the worktree. Binary files (a NUL in the first
+    block) get an empty result without any regex work. Returns the results and the shard's
+    byte/skip/timing counters.
+    """
+    scanner = current_scanner()
+    results: dict[str, list[Hit]] = {}
+    stats: Counter[str] = Counter()
+    reader = BlobReader() if blobs is not None else None
+    try:
+        for path in paths:
+            try:
+                data = reader.read(blobs[path]) if reader and blobs else read_file(path)
+            except OSError:
+                continue
+            if b"\0" in data[:BINARY_SNIFF_BYTES]:
+                stats["skipped binary"] += 1
+                stats["skipped bytes"] += len(data)
+                results[path] = []
+            else:
+                stats["files scanned"] += 1
+                stats["bytes scanned"] += len(data)
+                results[path] = scanner.scan(decode_blob(data))
+    finally:
+        if reader:
+            reader.close()
+    stats.update({f"seconds {kind}": spent for kind, spent in scanner.seconds.items()})
+    return results, stats
+
+
+def file_sizes(paths: list[str]) -> dict[str, int]:
+    """Return the worktree size of each path (0 if it cannot be stat'ed)."""
+    sizes: dict[str, int] = {}
     for path in paths:
-        if allowlisted(path) or path == SELF_PATH:
-            continue
         try:
-            with open(path, encoding="utf-8", errors="ignore") as handle:
-                lines = handle.readlines()
+            sizes[path] = os.path.getsize(path)
         except OSError:
+            sizes[path] = 0
+    return sizes
+
+
+def shard_by_size(paths: list[str], jobs: int, sizes: dict[str, int]) -> list[list[str]]:
+    """Split *paths* into at most *jobs* shards of roughly equal total bytes.
+
+    Balanced by size, not count: a handful of Grafana dashboard JSONs outweigh
+    hundreds of small manifests, so an even count split leaves one worker
+    holding all of them. Largest-first greedy onto the lightest shard.
+    """
+    jobs = max(1, min(jobs, sum(sizes[path] for path in paths) // MIN_SHARD_BYTES))
+    shards: list[list[str]] = [[] for _ in range(jobs)]
+    loads = [(0, index) for index in range(jobs)]
+    for path in sorted(paths, key=sizes.__getitem__, reverse=True):
+        load, index = heapq.heappop(loads)
+        shards[index].append(path)
+        heapq.heappush(loads, (load + sizes[path], index))
+    return [shard for shard in shards if shard]
+
+
+def run_shards(
+    shards: list[list[str]], sources: list[dict[str, str] | None]
+) -> Iterable[tuple[dict[str, list[Hit]], Counter[str]]]:
+    """Scan each shard -- in a process pool when there is more than one."""
+    if len(shards) == 1:
+        return [scan_shard(shards[0], sources[0])]
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+        return list(pool.map(scan_shard, shards, sources))
+
+
+def scan_files(  # pylint: disable=too-many-arguments,too-many-locals  # one knob per CLI mode
+    paths: list[str],
+    jobs: int = 1,
+    *,
+    cache: ScanCache | None = None,
+    tree: dict[str, tuple[str, int]] | None = None,
+    attributes_rev: str | None = None,
+    max_bytes: int = MAX_SCAN_BYTES,
+    stats: Counter[str] | None = None,
+) -> list[Violation]:
+    """Return one Violation per non-allowlisted identifier found.
+
+    With *jobs* > 1 the files are sharded across a process pool; violations are
+    merged back in the order of *paths*, so the output is identical to a
+    serial run. With a *cache*, files whose blob was already scanned under the
+    same pattern set are answered from it and never opened. With a *tree*
+    (from tree_entries for *rev*) the files are read from the git object store
+    rather than the worktree.
+
+    Before any of that, files .gitattributes marks generated or `-diff` (as of
+    *attributes_rev*, a trusted revision; the checkout's without one) and files
+    over *max_bytes* (0: no limit) are dropped, each named on stderr so the skip
+    is never silent. Byte, skip and per-pattern
+    timing counters are added to *stats*.
+    """
+    stats = Counter() if stats is None else stats
+    paths = [path for path in paths if not allowlisted(path) and path != SELF_PATH]
+    if tree is not None:
+        blobs = {path: blob for path, (blob, _size) in tree.items()}
+        sizes = {path: size for path, (_blob, size) in tree.items()}
+    else:
+        blobs = blob_ids() if cache else {}
+        sizes = file_sizes(paths)
+
+    generated = skipped_by_attributes(paths, attributes_rev)
+    results: dict[str, list[Hit]] = {}
+    todo: list[str] = []
+    for path in paths:
+        if path in generated:
+            source = f"at {attributes_rev}" if attributes_rev else "in the checkout"
+            print(f"not scanned (generated or -diff per .gitattributes {source}): {path}", file=sys.stderr)
+            stats["skipped generated"] += 1
+            stats["skipped bytes"] += sizes[path]
             continue
-        for lineno, line in enumerate(lines, 1):
-            for kind, pat in patterns.items():
-                for match in pat.finditer(line):
-                    if any(b.search(match.group(0)) for b in BENIGN):
-                        continue
-                    violations.append(f"{path}:{lineno}: {kind}")
-                    break
+        if max_bytes and sizes[path] > max_bytes:
+            print(f"not scanned ({sizes[path]} bytes > --max-bytes {max_bytes}): {path}", file=sys.stderr)
+            stats["skipped oversized"] += 1
+            stats["skipped bytes"] += sizes[path]
+            continue
+        cached = cache.get(blobs.get(path)) if cache else None
+        if cached is None:
+            todo.append(path)
+        else:
+            results[path] = cached
+
+    shards = shard_by_size(todo, jobs, sizes) if jobs > 1 else [todo]
+    sources = [{path: blobs[path] for path in shard} if tree is not None else None for shard in shards]
+    for shard_results, shard_stats in run_shards(shards, sources):
+        results.update(shard_results)
+        stats.update(shard_stats)
+
+    if cache:
+        for path in todo:
+            if path in blobs and path in results:
+                cache.put(blobs[path], results[path])
+    return [Violation(path, *hit) for path in paths for hit in results.get(path, [])]
+
+
+def skip_summary(stats: Counter[str]) -> str:
+    """One line describing what the skip layer dropped, or '' if nothing was."""
+    kinds = ("binary", "oversized", "generated")
+    skipped = {kind: stats[f"skipped {kind}"] for kind in kinds if stats[f"skipped {kind}"]}
+    if not skipped:
+        return ""
+    detail = ", ".join(f"{count} {kind}" for kind, count in skipped.items())
+    return f"skipped {sum(skipped.values())} files ({stats['skipped bytes'] / 1024:.0f} KiB unscanned): {detail}"
+
+
+def scan_added_lines(base: str, rev: str = "HEAD", stats: Counter[str] | None = None) -> list[Violation]:
+    """Scan only the lines added between *base* and *rev*.
+
+    Returns the violations, like scan_files; line, file, byte and per-pattern
+    timing counters are added to *stats*.
+    """
+    stats = Counter() if stats is None else stats
+    scanner = current_scanner()
+    violations: list[Violation] = []
+    files: set[str] = set()
+    for path, lineno, line in added_lines(base, rev):
+        if path.startswith(".private/") or path == SELF_PATH or allowlisted(path):
+            continue
+        files.add(path)
+        stats["lines scanned"] += 1
+        stats["bytes scanned"] += len(line)
+        violations.extend(Violation(path, lineno, *hit) for hit in scanner.line_hits(line))
+    stats["files scanned"] += len(files)
+    stats.update({f"seconds {kind}": spent for kind, spent in scanner.seconds.items()})
     return violations
 
 
-def main() -> int:
+def scan_tree(args: argparse.Namespace, stats: Counter[str]) -> tuple[list[Violation], str, ScanCache | None]:
+    """Run the whole-file scan main() was asked for.
+
+    Returns the violations, a scope phrase for the summary, and the (saved)
+    cache if --cache was given.
+    """
+    tree = tree_entries(args.rev) if args.rev else None
+    if args.diff_base:
+        paths = changed_files(args.diff_base, args.rev or "HEAD", tree)
+    else:
+        paths = list(tree) if tree is not None else tracked_files()
+    if args.paths:
+        named = {os.path.normpath(path) for path in args.paths}
+        paths = [path for path in paths if path in named]
+    cache = None
+    if args.cache is not None:
+        patterns = {**PATTERNS, **internal_domain_pattern()}
+        cache = open_cache(args.cache or git_path(CACHE_NAME), patterns, args.cache_max_entries)
+    violations = scan_files(
+        paths,
+        args.jobs,
+        cache=cache,
+        tree=tree,
+        # Never the attributes of the change being scanned: it could mark its own files -diff.
+        attributes_rev=args.diff_base or args.rev,
+        max_bytes=args.max_bytes,
+        stats=stats,
+    )
+    if cache:
+        cache.save()
+    if args.paths:
+        scope = f"{len(paths)} named"
+    else:
+        scope = f"{len(paths)} changed" if args.diff_base else f"all {len(paths)} tracked"
+    return violations, scope, cache
+
+
+def run_scan(args: argparse.Namespace, stats: Counter[str]) -> tuple[list[Violation], str, ScanCache | None]:
+    """Run the file or added-line scan main() was asked for; counters (cache ones too) land in *stats*."""
+    cache = None
+    if args.diff_lines:
+        violations = scan_added_lines(args.diff_base, args.rev or "HEAD", stats)
+        scope = f"{stats['lines scanned']} added lines in {stats['files scanned']} changed files"
+    else:
+        violations, scope, cache = scan_tree(args, stats)
+        scope = f"{scope} files"
+    if cache:
+        stats.update({"cache hits": cache.hits, "cache misses": cache.misses, "cache entries": len(cache.entries)})
+    if args.rev:
+        scope = f"{scope} at {args.rev}"
+    return violations, scope, cache
+
+
+def main(argv: list[str] | None = None) -> int:
     """Scan tracked files and fail (exit 1) on any non-allowlisted identifier."""
     parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        metavar="PATH",
+        help="scan only these tracked files (e.g. a hook's staged files) instead of the whole tree",
+    )
     parser.add_argument(
         "--diff-base",
         metavar="REV",
         help="scan only files changed between REV and HEAD (PR scope)",
     )
+    parser.add_argument(
+        "--diff-lines",
+        action="store_true",
+        help="with --diff-base, scan only the lines added since REV, not whole changed files",
+    )
+    parser.add_argument(
+        "--rev",
+        metavar="REV",
+        help="scan the tree at REV straight from the git object store (no checkout needed)",
+    )
     parser.add_argument(
         "--text-file",
         metavar="PATH",
@@ -259,14 +817,82 @@ def main() -> int:
         action="store_true",
         help="with --text-file, drop '#' comment lines and the verbose-diff block",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        metavar="N",
+        help="scan with up to N worker processes, sharded by file size (default: CPU count)",
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        default=MAX_SCAN_BYTES,
+        metavar="N",
+        help=f"report and skip files larger than N bytes; 0 for no limit (default: {MAX_SCAN_BYTES})",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("text", "json", "sarif"),
+        default="text",
+        help="output for file scans: human text, or JSON/SARIF with timing instrumentation",
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const="",
+        metavar="FILE",
+        help="reuse results for unchanged blobs across runs (default FILE: inside the git dir)",
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=50_000,
+        metavar="N",
+        help="with --cache, keep at most N blob results, evicting the least recently used",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="run as a warm daemon on a Unix socket; query it with scan_daemon.py",
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="with --serve, the socket to listen on (default: inside the git dir)",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=1800,
+        metavar="SECONDS",
+        help="with --serve, exit after this long without a request (default: 1800)",
+    )
+    args = parser.parse_args(argv)
 
+    if args.serve:
+        watched = scan_daemon.local_sources(os.path.dirname(os.path.abspath(__file__)))
+        return scan_daemon.serve(args.socket or scan_daemon.default_socket_path(), main, watched, args.idle_timeout)
     if args.text_file:
         return scan_text(args.text_file, args.strip_git_comments)
-
-    paths = changed_files(args.diff_base) if args.diff_base else tracked_files()
-    violations = scan_files(paths)
-
+    if args.diff_lines and not args.diff_base:
+        parser.error("--diff-lines needs --diff-base")
+
+    started = time.perf_counter()
+    stats: Counter[str] = Counter()
+    violations, scope, cache = run_scan(args, stats)
+
+    if args.format != "text":
+        report = build_report(violations, scope, stats, time.perf_counter() - started, SECRET_KINDS)
+        if args.format == "sarif":
+            report = to_sarif(report, {**PATTERNS, **internal_domain_pattern()})
+        print(json.dumps(report, indent=2))
+        return 1 if violations else 0
+
+    if cache:
+        print(cache.summary())
+    if summary := skip_summary(stats):
+        print(summary)
     if violations:
         print("Internal infrastructure identifiers found in tracked files:\n")
         for violation in violations:
@@ -279,8 +905,7 @@ def main() -> int:
         )
         return 1
 
-    scope = f"{len(paths)} changed" if args.diff_base else f"all {len(paths)} tracked"
-    print(f"OK -- no new internal infrastructure identifiers ({scope} files).")
+    print(f"OK -- no new internal infrastructure identifiers ({scope}).")
     return 0
 
 
@@ -8,14 +8,46 @@ bulk removal cannot silently take an app offline (as it nearly did for memini).
 Non-route uses of the variable are expected and allowlisted: device IPMI probe
 targets, the NAS S3 endpoint, the external-dns domain filter, the wildcard cert
 SAN, and the variable's own definition.
+
+"Sibling" means a ${SECRET_DOMAIN} list item with the same prefix within
+WINDOW lines. Candidate files are the git-tracked YAML under kubernetes/ (one
+`git ls-files`), prefiltered by one bytes search per file. Each hit is
+decoded once into a prefix -> line index of both kinds of item, so every check
+is a lookup rather than a fresh regex over the window.
+
+--structural parses the candidate manifests instead (see route_structure.py)
+and requires the sibling in the same HTTPRoute, Ingress or app-template route,
+however far apart the two hostnames are. Files that do not parse keep the text
+heuristic.
+
+--inventory takes the list items and route objects from the hostname
+inventory (see hostname_inventory.py), brought up to date from the git diff
+first, and reads a manifest only to print an orphan it reports.
+
+--watch is for local editing: after one full check it keeps the orphans of
+every file in memory and, on each save (see file_watch.py), re-checks only the
+files that changed, printing orphans that appeared (+) and resolved (-).
+Renames and deletions move or drop a file's entry. Unlike a CI run it also
+covers new files git does not track yet (but does not ignore), since a file
+saved or moved in an editor is not added until later.
 """
 
 from __future__ import annotations
 
+import argparse
+import bisect
 import pathlib
 import re
-import subprocess
 import sys
+import time
+from collections.abc import Iterable, Iterator
+from typing import NamedTuple
+
+import file_watch
+import hostname_inventory
+from git_tree import blob_id, git_path, read_mentioning, tracked_files, worktree_files
+from path_matcher import PathMatcher
+from route_structure import ListItem, Route, RouteCache, list_items
 
 ALLOWLIST = {
     "kubernetes/components/global-vars/cluster-secrets.yaml": "defines the variable",
@@ -24,6 +56,7 @@ ALLOWLIST = {
     "kubernetes/apps/network/opnsense-dns/app/helmrelease.yaml": "external-dns domainFilters",
     "kubernetes/apps/cert-manager/cert-manager/tls/certificate.yaml": "wildcard cert SAN",
 }
+ALLOWLISTED = PathMatcher(ALLOWLIST, prefixes=False)
 
 # Anchored to a real YAML list item (`<indent>- "value"` or `<indent>- value`),
 # not just any hyphen in the line -- an unanchored `-` also matches inside
@@ -37,30 +70,229 @@ ALLOWLIST = {
 # naive first cut would) makes the regex blind to that idiom -- the majority
 # of hostnames in this repo -- while still passing on unrelated files, which
 # defeats the guard silently instead of loudly.
-HOSTNAME_RE = re.compile(r'^\s*-\s*"?([^"]*)\$\{SECRET_INTERNAL_DOMAIN\}"?\s*$')
+#
+# The whitespace after the dash is matched possessively (`\s*+`): `[^"]*` can
+# match spaces too, and without it a long run of them is split between the two
+# every possible way before the match fails (see bench_patterns.py).
+HOSTNAME_RE = re.compile(r'^\s*-\s*+"?([^"]*)\$\{SECRET_INTERNAL_DOMAIN\}"?\s*$')
 
+INTERNAL = "${SECRET_INTERNAL_DOMAIN}"
+PRIMARY = "${SECRET_DOMAIN}"
 
-def sibling_re(prefix: str) -> re.Pattern:
-    """Return a regex pattern matching a SECRET_DOMAIN hostname with the given prefix."""
-    return re.compile(r'^\s*-\s*"?' + re.escape(prefix) + r'\$\{SECRET_DOMAIN\}"?\s*$')
+# Files without this are never decoded, let alone indexed.
+NEEDLE = INTERNAL.encode()
 
+# A sibling counts when it is within this many lines of the internal hostname.
+WINDOW = 4
 
-def main() -> int:
-    """Check that all internal-domain hostnames have a primary-domain sibling; exit 0 if OK, 1 if orphans found."""
-    files = subprocess.check_output(["grep", "-rl", "SECRET_INTERNAL_DOMAIN", "kubernetes/"], text=True).split()
+
+class FileIndex(NamedTuple):
+    """The hostname list items of one file, by 0-based line number."""
+
+    internal_items: list[tuple[int, str]]  # (line, prefix) of each ${SECRET_INTERNAL_DOMAIN} item
+    primary_items: dict[str, list[int]]  # prefix -> ascending lines of ${SECRET_DOMAIN} items
+
+
+def file_index(items: Iterable[ListItem]) -> FileIndex:
+    """Index list items by prefix.
+
+    A primary item is filed under each prefix the old per-hostname pattern
+    `-\\s*"?<prefix>${SECRET_DOMAIN}` would have accepted: when unquoted, the
+    prefix may also start inside the whitespace after the dash.
+    """
+    index = FileIndex([], {})
+    for item in items:
+        if item.var == "SECRET_INTERNAL_DOMAIN":
+            index.internal_items.append((item.line, item.prefix))
+            continue
+        space = item.space
+        keys = {item.prefix} if item.quote else {space[k:] + item.prefix for k in range(len(space) + 1)}
+        for key in keys:
+            index.primary_items.setdefault(key, []).append(item.line)
+    return index
+
+
+def index_lines(lines: list[str]) -> FileIndex:
+    """Index every internal- and primary-domain list item of a file in one pass."""
+    return file_index(list_items(lines))
+
+
+def orphan_lines(index: FileIndex) -> list[int]:
+    """Return the lines of internal hostnames with no primary sibling within WINDOW lines."""
+    orphans = []
+    for i, prefix in index.internal_items:
+        siblings = index.primary_items.get(prefix, [])
+        at = bisect.bisect_left(siblings, i - WINDOW)
+        if at == len(siblings) or siblings[at] > i + WINDOW:
+            orphans.append(i)
+    return orphans
+
+
+def manifest_paths(worktree: bool = False) -> list[str]:
+    """List the git-tracked YAML under kubernetes/ -- plus, with *worktree*, the untracked files not ignored."""
+    return (worktree_files if worktree else tracked_files)("kubernetes/*.yaml", "kubernetes/*.yml")
+
+
+def files_mentioning(paths: Iterable[str], needle: bytes = NEEDLE) -> Iterator[tuple[str, list[str]]]:
+    """Yield (path, lines) for each file containing *needle*."""
+    for path, contents in read_mentioning(paths, needle):
+        yield path, contents.decode("utf-8").split("\n")
+
+
+def structural_orphans(index: FileIndex, routes: list[Route]) -> list[int]:
+    """Return the lines of internal hostnames with no primary sibling in the same route object.
+
+    Internal-domain list items outside every route object (probe targets and
+    the like) are still judged by the text heuristic, so nothing the text
+    mode would catch slips through.
+    """
+    covered: set[int] = set()
+    orphans: set[int] = set()
+    for route in routes:
+        primary = {host.removesuffix(PRIMARY) for _line, host in route.hosts if host.endswith(PRIMARY)}
+        for line, host in route.hosts:
+            if host.endswith(INTERNAL):
+                covered.add(line)
+                if host.removesuffix(INTERNAL) not in primary:
+                    orphans.add(line)
+    orphans.update(i for i in orphan_lines(index) if i not in covered)
+    return sorted(orphans)
+
+
+def check(paths: list[str], cache: RouteCache | None = None) -> list[str]:
+    """Return one 'path:line: item' per orphaned internal hostname; *cache* enables --structural."""
+    return [
+        orphan for path, contents in read_mentioning(paths, NEEDLE) for orphan in file_orphans(path, contents, cache)
+    ]
+
+
+def file_orphans(path: str, contents: bytes, cache: RouteCache | None = None) -> list[str]:
+    """Return check()'s 'path:line: item' orphans for one file's *contents*."""
+    text = contents.decode("utf-8")
+    lines = text.split("\n")
+    index = index_lines(lines)
+    routes = cache.routes(blob_id(contents), text) if cache else None
+    found = orphan_lines(index) if routes is None else structural_orphans(index, routes)
+    return [f"{path}:{i + 1}: {lines[i].strip()}" for i in found]
+
+
+def inventory_orphans(inventory: dict, paths: list[str], structural: bool = False) -> list[str]:
+    """Return check()'s orphans for *paths* from a hostname inventory, reading only files that have one."""
     orphans: list[str] = []
-    for path in files:
-        if path in ALLOWLIST:
+    for path in paths:
+        entry = inventory["files"].get(path)
+        if entry is None:
             continue
-        lines = pathlib.Path(path).read_text(encoding="utf-8").split("\n")
-        for i, line in enumerate(lines):
-            m = HOSTNAME_RE.search(line)
-            if not m:
-                continue
-            pat = sibling_re(m.group(1))
-            lo, hi = max(0, i - 4), min(len(lines), i + 5)
-            if not any(pat.search(lines[j]) for j in range(lo, hi) if j != i):
-                orphans.append(f"{path}:{i + 1}: {line.strip()}")
+        index = file_index(hostname_inventory.entry_items(entry))
+        routes = hostname_inventory.entry_routes(entry) if structural else None
+        found = orphan_lines(index) if routes is None else structural_orphans(index, routes)
+        if found:
+            lines = pathlib.Path(path).read_text(encoding="utf-8").split("\n")
+            orphans += [f"{path}:{i + 1}: {lines[i].strip()}" for i in found]
+    return orphans
+
+
+class WatchState:
+    """The --watch state: the manifests in scope and the orphans each one has now."""
+
+    def __init__(self, cache: RouteCache | None) -> None:
+        self.cache = cache
+        self.scope = self.list_scope()
+        self.known: dict[str, list[str]] = {}
+        for path, contents in read_mentioning(sorted(self.scope), NEEDLE):
+            self.report(path, file_orphans(path, contents, cache))
+
+    @staticmethod
+    def list_scope() -> set[str]:
+        """Return the manifests to check: tracked or new, and not allowlisted."""
+        return {path for path in manifest_paths(worktree=True) if not ALLOWLISTED(path)}
+
+    def total(self) -> int:
+        """Return the number of orphans right now."""
+        return sum(map(len, self.known.values()))
+
+    def update(self, changed: set[str]) -> int:
+        """Re-check every known or in-scope file at or below a *changed* path; return how many."""
+        if not changed <= self.scope:  # something new, moved, or a whole directory: list the tree again
+            self.scope = self.list_scope()
+        affected = set()
+        for changed_path in changed:
+            prefix = changed_path + "/"
+            affected |= {p for p in self.scope | self.known.keys() if p == changed_path or p.startswith(prefix)}
+        for path in sorted(affected):
+            hit = next(read_mentioning([path], NEEDLE), None) if path in self.scope else None
+            self.report(path, file_orphans(path, hit[1], self.cache) if hit else [])
+        return len(affected)
+
+    def report(self, path: str, found: list[str]) -> None:
+        """Record *path*'s orphans, printing the ones that resolved (-) and appeared (+)."""
+        old = self.known.pop(path, [])
+        if found:
+            self.known[path] = found
+        for orphan in sorted(set(old) - set(found)):
+            print(f"- {orphan}", flush=True)
+        for orphan in sorted(set(found) - set(old)):
+            print(f"+ {orphan}", flush=True)
+
+
+def watch(cache: RouteCache | None, poll: float | None) -> int:
+    """Re-check manifests as they are saved until interrupted."""
+    state = WatchState(cache)
+    watched = file_watch.watcher("kubernetes", poll)
+    print(f"watching {len(state.scope)} manifests ({watched.name}); {state.total()} orphans", flush=True)
+    try:
+        while True:
+            changed = watched.wait()
+            started = time.perf_counter()
+            count = state.update(changed)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"  {count} files re-checked in {elapsed:.1f} ms; {state.total()} orphans", flush=True)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        watched.close()
+        if cache:
+            cache.save()
+
+
+def main() -> int:
+    """Check that all internal-domain hostnames have a primary-domain sibling; exit 0 if OK, 1 if orphans found."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--structural",
+        action="store_true",
+        help="pair hostnames per parsed route object (needs PyYAML; falls back to the text heuristic per file)",
+    )
+    parser.add_argument(
+        "--inventory",
+        nargs="?",
+        const="",
+        metavar="FILE",
+        help="pair from the hostname inventory instead of reading every manifest (default: the one in the git dir)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and re-check each manifest as it is saved, moved or deleted (Ctrl-C to stop)",
+    )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        metavar="SECONDS",
+        help="with --watch, poll the tree at this interval instead of using inotify",
+    )
+    args = parser.parse_args()
+
+    if args.watch:
+        return watch(RouteCache(git_path("route-structure-cache.json")) if args.structural else None, args.poll)
+    paths = [path for path in manifest_paths() if not ALLOWLISTED(path)]
+    if args.inventory is not None:
+        orphans = inventory_orphans(hostname_inventory.refresh(args.inventory or None), paths, args.structural)
+    else:
+        cache = RouteCache(git_path("route-structure-cache.json")) if args.structural else None
+        orphans = check(paths, cache)
+        if cache:
+            cache.save()
 
     if orphans:
         print("Internal-domain hostnames with no ${SECRET_DOMAIN} sibling:\n")
@@ -0,0 +1,160 @@
+"""Report which paths under a directory tree changed, for the guards' --watch modes.
+
+On Linux this is inotify, called through ctypes so no package is needed: one
+watch per directory, added and dropped as directories are created, moved and
+deleted. Elsewhere, or with an explicit poll interval, it falls back to
+comparing a stat snapshot of the tree.
+
+wait() blocks until something changes, then gathers events for a short
+debounce window (an editor's save is often several: write a temp file, rename
+it over the original, touch the backup) and returns them as one set of paths.
+A path may name a file or a whole directory that was created, moved or
+deleted; the caller re-examines everything at or below each one. After an
+inotify queue overflow the root itself is returned.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+# IN_MODIFY is left out on purpose: a write in progress is not worth a check,
+# IN_CLOSE_WRITE follows it.
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# struct inotify_event: wd, mask, cookie, len, then len bytes of NUL-padded name.
+EVENT = struct.Struct("iIII")
+
+DEBOUNCE = 0.02
+POLL_INTERVAL = 1.0
+
+
+class InotifyWatcher:
+    """Watch every directory under *root* with inotify."""
+
+    name = "inotify"
+
+    def __init__(self, root: str, debounce: float = DEBOUNCE) -> None:
+        self.root = root
+        self.debounce = debounce
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1: {os.strerror(errno)}")
+        self.dirs: dict[int, str] = {}
+        self.add_tree(root)
+
+    def add_tree(self, top: str) -> None:
+        """Watch *top* and every directory below it."""
+        for dirpath, _dirs, _files in os.walk(top):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd >= 0:  # else it vanished while we walked; its parent reports that
+                self.dirs[wd] = dirpath
+
+    def remove_tree(self, top: str) -> None:
+        """Stop watching *top* and everything below it (it moved away; its new place is added fresh)."""
+        prefix = top + os.sep
+        for wd, path in list(self.dirs.items()):
+            if path == top or path.startswith(prefix):
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.dirs[wd]
+
+    def wait(self) -> set[str]:
+        """Block until something changes; return every path touched within the debounce window."""
+        changed: set[str] = set()
+        timeout = None
+        while select.select([self.fd], [], [], timeout)[0]:
+            self.read_events(os.read(self.fd, 64 * 1024), changed)
+            timeout = self.debounce
+        return changed
+
+    def read_events(self, data: bytes, changed: set[str]) -> None:
+        """Add the paths named by the raw events in *data* to *changed*, tracking directories as they move."""
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT.unpack_from(data, offset)
+            name = data[offset + EVENT.size : offset + EVENT.size + length].rstrip(b"\0")
+            offset += EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                changed.add(self.root)
+                continue
+            directory = self.dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:  # the directory itself is gone
+                del self.dirs[wd]
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(path)
+                elif mask & IN_MOVED_FROM:
+                    self.remove_tree(path)
+            changed.add(path)
+
+    def close(self) -> None:
+        """Release the inotify descriptor and all its watches."""
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Compare a stat snapshot of every file under *root* every *interval* seconds."""
+
+    name = "polling"
+
+    def __init__(self, root: str, interval: float = POLL_INTERVAL) -> None:
+        self.root = root
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self) -> dict[str, tuple[int, int, int]]:
+        """Return {path: (mtime, size, inode)} for every file under the root."""
+        found = {}
+        for dirpath, _dirs, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found[path] = (st.st_mtime_ns, st.st_size, st.st_ino)
+        return found
+
+    def wait(self) -> set[str]:
+        """Block until a poll sees a file added, removed or rewritten; return those paths."""
+        while True:
+            time.sleep(self.interval)
+            current = self.scan()
+            changed = {
+                path for path in current.keys() | self.snapshot.keys() if current.get(path) != self.snapshot.get(path)
+            }
+            self.snapshot = current
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+def watcher(root: str, poll: float | None = None) -> InotifyWatcher | PollingWatcher:
+    """Return an inotify watcher for *root*, or a polling one if *poll* is set or inotify is unavailable."""
+    if poll is None:
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError):  # no inotify, or no libc symbol for it
+            pass
+    return PollingWatcher(root, poll or POLL_INTERVAL)
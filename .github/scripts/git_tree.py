@@ -0,0 +1,248 @@
+"""Git plumbing shared by the CI guard scripts.
+
+Everything the guards need to know about the tree comes from git itself --
+which files are tracked, what a revision contains, what changed since a base,
+how .gitattributes classifies a path -- so untracked worktree junk is never
+scanned and a bare clone or the PR merge ref works as well as a checkout.
+Each helper is one git invocation, whatever the number of paths.
+read_mentioning() then reads the worktree copies of the paths git named.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import mmap
+import os
+import re
+import subprocess
+from collections.abc import Iterable, Iterator
+from typing import Self
+
+# The new-file side of a `git diff -U0` hunk header: `@@ -a[,b] +c[,d] @@`.
+HUNK = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+# One escape in a path git has C-quoted: `\"`, `\\`, `\t` and friends, or `\ooo`
+# for a byte it will not print (a control character, or any non-ASCII byte
+# when core.quotepath is on).
+C_ESCAPE = re.compile(rb"\\([0-7]{3}|.)", re.DOTALL)
+C_ESCAPES = {b"a": 7, b"b": 8, b"t": 9, b"n": 10, b"v": 11, b"f": 12, b"r": 13}
+
+# Mapping a file costs more than reading it until it is this big; the
+# manifests are almost all a few KiB.
+MMAP_MIN_BYTES = 1024 * 1024
+
+
+class BlobReader:
+    """Stream blob contents from one long-lived `git cat-file --batch` process.
+
+    One pipe for the whole scan instead of an open/read/close per file, and no
+    worktree needed: any revision whose objects are present (a bare clone, the
+    PR merge ref) can be scanned as-is.
+    """
+
+    def __init__(self) -> None:
+        # Lives for the whole scan and is closed in close(); a with-block cannot span that.
+        self.proc = subprocess.Popen(  # pylint: disable=consider-using-with
+            ["git", "cat-file", "--batch"], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def read(self, blob: str) -> bytes:
+        """Return the raw contents of *blob*."""
+        assert self.proc.stdin and self.proc.stdout
+        self.proc.stdin.write(f"{blob}\n".encode())
+        self.proc.stdin.flush()
+        header = self.proc.stdout.readline().split()
+        if len(header) != 3:
+            raise OSError(f"git cat-file could not read blob {blob}")
+        data = self.proc.stdout.read(int(header[2]))
+        self.proc.stdout.read(1)  # the LF that terminates every object
+        return data
+
+    def close(self) -> None:
+        """End the batch process."""
+        if self.proc.stdin:
+            self.proc.stdin.close()
+        self.proc.wait()
+
+
+def tracked_files(*pathspecs: str) -> list[str]:
+    """List git-tracked files (optionally only those matching *pathspecs*), excluding .private/."""
+    out = subprocess.check_output(["git", "ls-files", "--", *pathspecs], text=True)
+    return [f for f in out.splitlines() if not f.startswith(".private/")]
+
+
+def worktree_files(*pathspecs: str) -> list[str]:
+    """List tracked files plus untracked ones that are not ignored -- what a local edit can touch."""
+    out = subprocess.check_output(["git", "ls-files", "--cached", "--others", "--exclude-standard", "--", *pathspecs])
+    return [f for f in out.decode().splitlines() if not f.startswith(".private/")]
+
+
+def git_path(name: str) -> str:
+    """Return the path of *name* inside the git dir, where per-clone state belongs."""
+    return subprocess.check_output(["git", "rev-parse", "--git-path", name], text=True).strip()
+
+
+def blob_id(data: bytes) -> str:
+    """Return the git blob ID of *data*, exactly as `git hash-object` would, without running git."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data, usedforsecurity=False).hexdigest()
+
+
+def read_mentioning(paths: Iterable[str], needle: bytes) -> Iterator[tuple[str, bytes]]:
+    """Yield (path, contents) for each file containing *needle*.
+
+    Each file is loaded with one raw read -- or mapped, from MMAP_MIN_BYTES up --
+    and tested with one bytes search. Only the few that match are copied out of
+    that same buffer, so nothing is read twice.
+    """
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue  # tracked but deleted in the worktree
+        try:
+            size = os.fstat(fd).st_size
+            if size < MMAP_MIN_BYTES:
+                data: bytes | mmap.mmap = os.read(fd, size)
+            else:
+                data = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        with contextlib.closing(data) if isinstance(data, mmap.mmap) else contextlib.nullcontext():
+            if data.find(needle) == -1:
+                continue
+            contents = data[:]
+        yield path, contents
+
+
+def tree_entries(rev: str) -> dict[str, tuple[str, int]]:
+    """Map each file in the tree at *rev* to its (blob ID, size), excluding .private/."""
+    out = subprocess.check_output(["git", "ls-tree", "-r", "-l", "-z", "--full-tree", rev], text=True)
+    entries: dict[str, tuple[str, int]] = {}
+    for entry in out.split("\0"):
+        if not entry:
+            continue
+        meta, path = entry.split("\t", 1)
+        _mode, kind, blob, size = meta.split()
+        if kind == "blob" and not path.startswith(".private/"):
+            entries[path] = (blob, int(size))
+    return entries
+
+
+def blob_ids() -> dict[str, str]:
+    """Map each tracked path to its git blob ID, omitting files dirty in the worktree.
+
+    `git ls-files -s` reports the *index* blob, which only names what is on
+    disk when the file is unmodified; a dirty file has no trustworthy ID and is
+    always scanned fresh.
+    """
+    staged = subprocess.check_output(["git", "ls-files", "-s", "-z"], text=True)
+    dirty = set(subprocess.check_output(["git", "ls-files", "-m", "-z"], text=True).split("\0"))
+    blobs: dict[str, str] = {}
+    for entry in staged.split("\0"):
+        if not entry:
+            continue
+        meta, path = entry.split("\t", 1)
+        if path not in dirty:
+            blobs[path] = meta.split()[1]
+    return blobs
+
+
+def changed_files(base: str, rev: str = "HEAD", tracked: Iterable[str] | None = None) -> list[str]:
+    """List files changed between *base* and *rev* (deletions excluded).
+
+    *tracked* is the set of scannable paths to intersect with; by default the
+    working tree's tracked files.
+    """
+    out = subprocess.check_output(["git", "diff", "--name-only", "--diff-filter=d", base, rev], text=True)
+    tracked = set(tracked_files() if tracked is None else tracked)
+    return [f for f in out.splitlines() if f in tracked]
+
+
+def unquote_path(name: str) -> str:
+    """Undo git's C-style quoting of a path in diff output; a path git left bare is returned as-is."""
+    if len(name) < 2 or not name.startswith('"') or not name.endswith('"'):
+        return name
+
+    def byte(match: re.Match[bytes]) -> bytes:
+        escape = match.group(1)
+        if len(escape) == 3:
+            return bytes([int(escape, 8)])
+        return bytes([C_ESCAPES[escape]]) if escape in C_ESCAPES else escape
+
+    return C_ESCAPE.sub(byte, name[1:-1].encode("utf-8")).decode("utf-8", errors="ignore")
+
+
+def added_lines(base: str, rev: str = "HEAD") -> Iterator[tuple[str, int, str]]:
+    """Yield (path, line number, text) for every line added between *base* and *rev*.
+
+    Streams `git diff -U0` rather than reading the touched files, so the cost is
+    the size of the change. Renames are disabled on purpose: a file moved out
+    of an allowlisted directory must be judged on all of its lines at the new
+    path, not waved through as an unchanged rename. --text likewise: without it
+    a file that is binary, holds a NUL or is marked `-diff` in .gitattributes
+    shows up as "Binary files differ" with no lines at all, so a change could
+    hide a value just by marking its own file. --no-textconv keeps the lines
+    as committed rather than as a diff driver renders them.
+    """
+    cmd = ["git", "-c", "core.quotepath=off", "diff", "-U0", "--no-color", "--no-ext-diff", "--no-renames"]
+    cmd += ["--text", "--no-textconv", "--diff-filter=d", "--src-prefix=a/", "--dst-prefix=b/", base, rev]
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE) as proc:
+        assert proc.stdout
+        path: str | None = None
+        in_header = False
+        lineno = 0
+        for raw in proc.stdout:
+            line = raw.decode("utf-8", errors="ignore").rstrip("\n").removesuffix("\r")
+            if line.startswith("diff --git "):
+                path, in_header = None, True
+            elif in_header and line.startswith("+++ "):
+                # `+++ /dev/null` never occurs with --diff-filter=d; anything else is b/<path>,
+                # C-quoted if it holds `"`, `\` or a control character, and followed by
+                # a TAB if it holds a space. A TAB in the name itself is always quoted.
+                name = unquote_path(line[len("+++ ") :].removesuffix("\t"))
+                path = name[len("b/") :] if name.startswith("b/") else None
+            elif line.startswith("@@"):
+                in_header = False
+                match = HUNK.match(line)
+                lineno = int(match.group(1)) if match else 0
+            elif not in_header and path and line.startswith("+"):
+                yield path, lineno, line[1:]
+                lineno += 1
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+
+def skipped_by_attributes(paths: list[str], rev: str | None = None) -> set[str]:
+    """Return the paths .gitattributes marks `-diff` (incl. `binary`) or `linguist-generated`.
+
+    One `git check-attr --stdin` call for the whole list. With *rev*, the
+    attributes in force at that revision are used (git 2.40+). On older git
+    nothing is skipped rather than falling back to the checkout's attributes,
+    which may be the very change under scan: scanning too much is safe.
+    """
+    if not paths:
+        return set()
+    attrs = ["diff", "linguist-generated"]
+    proc = subprocess.run(
+        ["git", "check-attr", "-z", "--stdin", *(["--source", rev] if rev else []), *attrs],
+        input="\0".join(paths),
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode and rev:
+        return set()
+    proc.check_returncode()
+    fields = proc.stdout.split("\0")
+    return {
+        path
+        for path, attr, value in zip(fields[0::3], fields[1::3], fields[2::3])
+        if (attr == "diff" and value == "unset") or (attr == "linguist-generated" and value in ("set", "true"))
+    }
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Build the hostname inventory: every ${SECRET_*DOMAIN} hostname in the manifests, in one file.
+
+The route guard, its --structural mode and reclaim_stale_dns.py's keep-list
+each used to rediscover the same hostnames their own way (a bytes prefilter,
+a YAML parse, a `git grep`). This builds that answer once, in one pass over the
+git-tracked files under kubernetes/, and writes it as versioned JSON in the
+git dir for any of them to load instead.
+
+Per file, keyed by path:
+
+    blob     git blob ID of the contents the records were taken from
+    routes   [[kind, name], ...] route objects found by route_structure.py,
+             or null when the file was not parsed (no PyYAML, not plain YAML)
+    records  one per line that carries a hostname, in line order:
+             line   1-based line number
+             hosts  [[prefix, var], ...] every `<prefix>.${var}` on the line
+             item   [space, quote, prefix, var] if the line is a YAML list item
+                    the route guard pairs, else null
+             route  [index into routes, scalar value] if the line is a route
+                    hostname, else null
+
+`var` is SECRET_INTERNAL_DOMAIN or SECRET_DOMAIN. The top level also records
+the commit the inventory was built at, the files that differed from it, when
+it was built (`built_at`, UTC) and `internal_hostnames`: internal_hostnames()
+already applied, so reclaim_stale_dns.py -- which runs alone in a pod --
+reads its git keep-list without repeating the filter.
+
+A rebuild is incremental: only the files `git diff` reports since that commit,
+plus the ones that were dirty then, are read again -- and only those whose
+blob ID actually changed are re-parsed. A missing or unreadable inventory, an
+unknown commit, a version bump or PyYAML appearing/disappearing all force a
+full build.
+
+Run locally:  python3 .github/scripts/hostname_inventory.py [--full] [--output FILE]
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import pathlib
+import re
+import subprocess
+import sys
+
+import route_structure as rs
+from git_tree import blob_id, git_path, read_mentioning, tracked_files
+
+# Bump when scan_file() would record something different for the same blob.
+INVENTORY_VERSION = 1
+INVENTORY_NAME = "hostname-inventory.json"
+
+SCOPE = "kubernetes/"
+
+# Files without this are never decoded.
+NEEDLE = b"${SECRET_"
+
+# The hostname shape reclaim_stale_dns.py's `git grep -o` keep-list matches.
+# git's matcher is linear; Python's would retry from every character of a long
+# dotted run that turns out not to end in a variable, so a match may only start
+# where such a run does, skipping to its first letter or digit -- the same
+# leftmost match git reports (see bench_patterns.py).
+HOST_RE = re.compile(r"(?<![a-z0-9.-])[.-]*+([a-z0-9][a-z0-9.-]*)\.\$\{(SECRET_INTERNAL_DOMAIN|SECRET_DOMAIN)\}")
+
+
+def default_path() -> str:
+    """Return the inventory inside the git dir, so each clone gets its own."""
+    return git_path(INVENTORY_NAME)
+
+
+def yaml_available() -> bool:
+    """Return True if route_structure.py can parse (PyYAML is importable)."""
+    return importlib.util.find_spec("yaml") is not None
+
+
+def diff_names(commit: str) -> set[str] | None:
+    """Return the files under SCOPE whose worktree contents differ from *commit*, or None if it is unknown."""
+    proc = subprocess.run(
+        ["git", "diff", "--name-only", "-z", "--no-renames", commit, "--", SCOPE],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return None if proc.returncode else {name for name in proc.stdout.split("\0") if name}
+
+
+def scan_file(contents: bytes, parse_routes: bool) -> dict:
+    """Return the inventory entry for one file's *contents*; routes are parsed only if *parse_routes*."""
+    text = contents.decode("utf-8", errors="replace")
+    lines = text.split("\n")
+    records: dict[int, dict] = {}
+
+    def record(i: int) -> dict:
+        return records.setdefault(i, {"line": i + 1, "hosts": [], "item": None, "route": None})
+
+    for i, line in enumerate(lines):
+        if "${SECRET_" in line and (hosts := [list(m.groups()) for m in HOST_RE.finditer(line)]):
+            record(i)["hosts"] = hosts
+    for item in rs.list_items(lines):
+        record(item.line)["item"] = [item.space, item.quote, item.prefix, item.var]
+
+    routes = rs.routes_in(text) if parse_routes and records else None
+    for n, route in enumerate(routes or []):
+        for i, value in route.hosts:
+            if "${SECRET_" in value:
+                record(i)["route"] = [n, value]
+    return {
+        "blob": blob_id(contents),
+        "routes": None if routes is None else [[route.kind, route.name] for route in routes],
+        "records": [records[i] for i in sorted(records)],
+    }
+
+
+def load(path: str) -> dict | None:
+    """Return the inventory at *path*, or None if it is missing, unreadable or another version."""
+    try:
+        inventory = json.loads(pathlib.Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(inventory, dict) or inventory.get("version") != INVENTORY_VERSION:
+        return None
+    return inventory
+
+
+def save(inventory: dict, path: str) -> None:
+    """Write *inventory* to *path* atomically."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as handle:
+        json.dump(inventory, handle, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def stale_paths(previous: dict | None, commit: str, dirty: set[str]) -> set[str] | None:
+    """Return the files *previous* may be wrong about, or None if it cannot be reused at all."""
+    if not previous or previous["yaml"] != yaml_available():
+        return None
+    changed = dirty if previous["commit"] == commit else diff_names(previous["commit"])
+    return None if changed is None else changed | set(previous["dirty"])
+
+
+def build(previous: dict | None = None) -> tuple[dict, int, bool]:
+    """Return (inventory, files parsed, whether *previous* was reused) for the current worktree.
+
+    Entries of *previous* are kept for every file git says is unchanged since
+    it was built; the rest are read, and parsed again only on a new blob ID.
+    """
+    commit = subprocess.check_output(["git", "rev-parse", "HEAD"], text=True).strip()
+    tracked = tracked_files(SCOPE)
+    dirty = diff_names("HEAD") or set()
+    stale = stale_paths(previous, commit, dirty)
+
+    old: dict[str, dict] = previous["files"] if previous and stale is not None else {}
+    if stale is None:
+        files, candidates = {}, tracked
+    else:
+        present = set(tracked)
+        files = {path: entry for path, entry in old.items() if path not in stale and path in present}
+        candidates = [path for path in tracked if path in stale]
+
+    parsed = 0
+    for path, contents in read_mentioning(candidates, NEEDLE):
+        entry = old.get(path)
+        if entry is None or entry["blob"] != blob_id(contents):
+            entry = scan_file(contents, yaml_available())
+            parsed += 1
+        if entry["records"]:
+            files[path] = entry
+    inventory = {
+        "version": INVENTORY_VERSION,
+        "commit": commit,
+        "yaml": yaml_available(),
+        "dirty": sorted(dirty),
+        "built_at": datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds"),
+        "files": dict(sorted(files.items())),
+    }
+    inventory["internal_hostnames"] = sorted(internal_hostnames(inventory))
+    return inventory, parsed, stale is not None
+
+
+def refresh(path: str | None = None, full: bool = False) -> dict:
+    """Bring the inventory at *path* (default: in the git dir) up to date and return it."""
+    path = path or default_path()
+    inventory, _parsed, _incremental = build(None if full else load(path))
+    save(inventory, path)
+    return inventory
+
+
+def internal_hostnames(inventory: dict) -> set[str]:
+    """Return every ${SECRET_INTERNAL_DOMAIN} hostname prefix -- reclaim_stale_dns.py's git keep-list."""
+    return {
+        prefix
+        for entry in inventory["files"].values()
+        for record in entry["records"]
+        for prefix, var in record["hosts"]
+        if var == "SECRET_INTERNAL_DOMAIN"
+    }
+
+
+def entry_items(entry: dict) -> list[rs.ListItem]:
+    """Return the route guard's list items of an inventory entry."""
+    return [rs.ListItem(record["line"] - 1, *record["item"]) for record in entry["records"] if record["item"]]
+
+
+def entry_routes(entry: dict) -> list[rs.Route] | None:
+    """Return an entry's route objects with their ${SECRET_*} hostnames, or None if it was not parsed."""
+    if entry["routes"] is None:
+        return None
+    hosts: list[list[tuple[int, str]]] = [[] for _ in entry["routes"]]
+    for record in entry["records"]:
+        if record["route"]:
+            n, value = record["route"]
+            hosts[n].append((record["line"] - 1, value))
+    return [rs.Route(kind, name, found) for (kind, name), found in zip(entry["routes"], hosts)]
+
+
+def main() -> int:
+    """Build or update the inventory and print a one-line summary."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help=f"inventory file (default: {INVENTORY_NAME} in the git dir)")
+    parser.add_argument("--full", action="store_true", help="ignore the existing inventory and rescan everything")
+    args = parser.parse_args()
+
+    path = args.output or default_path()
+    inventory, parsed, incremental = build(None if args.full else load(path))
+    save(inventory, path)
+
+    records = sum(len(entry["records"]) for entry in inventory["files"].values())
+    mode = "incremental" if incremental else "full"
+    print(
+        f"{path}: {len(inventory['files'])} files, {records} hostname lines, "
+        f"{len(internal_hostnames(inventory))} internal hostnames ({mode} build, {parsed} files parsed)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
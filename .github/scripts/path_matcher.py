@@ -0,0 +1,47 @@
+"""Compiled path allowlists shared by the CI guard scripts.
+
+Both guards keep an ALLOWLIST of glob -> reason and used to test every path
+against every entry with fnmatch. PathMatcher compiles such a list once: the
+entries that are plain prefixes (a literal path, or a `dir/**` glob) collapse
+into one tuple for a single C-level str.startswith, and only globs with a
+wildcard before their tail fall through to one combined fnmatch regex.
+
+The decision is the one the identifier guard has always made -- a path is
+allowlisted when it fnmatches an entry OR starts with the entry minus its
+trailing `*`s -- so a `dir/**` entry covers everything below dir/.
+
+With prefixes=False (the route guard) nothing is a prefix: an entry without
+a wildcard matches only that exact path, by set membership, and the rest by
+fnmatch alone.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+from fnmatch import translate
+
+
+class PathMatcher:  # pylint: disable=too-few-public-methods  # a compiled predicate
+    """Answer "is this path allowlisted?" with one prefix test and at most one regex."""
+
+    def __init__(self, globs: Iterable[str], *, prefixes: bool = True) -> None:
+        globs = list(globs)
+        if prefixes:
+            self.exact: frozenset[str] = frozenset()
+            self.prefixes = tuple(sorted({glob.rstrip("*") for glob in globs}))
+            # A glob whose only wildcards are its trailing `*` run is fully decided by
+            # its prefix: fnmatch's `*` also crosses `/`. Only the rest need a regex.
+            wild = [glob for glob in globs if any(char in glob.rstrip("*") for char in "*?[")]
+        else:
+            wild = [glob for glob in globs if any(char in glob for char in "*?[")]
+            self.exact = frozenset(globs).difference(wild)
+            self.prefixes = ()
+        self.regex = re.compile("|".join(translate(glob) for glob in wild)) if wild else None
+
+    def __call__(self, path: str) -> bool:
+        return (
+            path in self.exact
+            or path.startswith(self.prefixes)
+            or (self.regex is not None and self.regex.match(path) is not None)
+        )
@@ -0,0 +1,166 @@
+"""Find the route objects in a manifest by parsing it, for the route guard's --structural mode.
+
+The text heuristic pairs hostnames that are list items within a few lines of
+each other. That misses a sibling further down a long `hostnames:` list and
+can pair two hostnames from unrelated lists. This module reads the YAML
+itself and returns each route object with its hostnames, so pairing can be
+checked per object:
+
+- HTTPRoute   spec.hostnames[]
+- Ingress     spec.rules[].host
+- HelmRelease spec.values.route.<name>.hostnames[]  (app-template routes)
+
+Only the node graph is composed (no Python objects are built), with the
+libyaml-backed CSafeLoader when PyYAML has it. PyYAML is optional and only
+imported on a cache miss. Without it, or for a file that is not plain YAML
+(e.g. a Helm template), RouteCache.routes() returns None and the caller keeps
+the text heuristic for that file.
+
+Results are cached by git blob ID in the git dir, so a repeat run parses only
+what changed since the last one.
+
+list_items() is the text-level view the route guard started from and still
+falls back to: each `- <prefix>${SECRET_[INTERNAL_]DOMAIN}` YAML list item,
+found by a line regex that works on Helm templates too.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import re
+from collections.abc import Iterable, Iterator
+from typing import Any, NamedTuple
+
+# Bump when routes_in() would return something different for the same blob.
+CACHE_VERSION = 1
+
+# Both kinds of list item in one pass: the same anchoring as the route guard's
+# HOSTNAME_RE, with the whitespace and quote before the prefix captured so
+# the guard can work out every prefix a ${SECRET_DOMAIN} item pairs with. That
+# whitespace is possessive for the same reason as in HOSTNAME_RE.
+LIST_ITEM_RE = re.compile(r'^\s*-(\s*+)("?)([^"]*)\$\{(SECRET_INTERNAL_DOMAIN|SECRET_DOMAIN)\}"?\s*$')
+
+
+class Route(NamedTuple):
+    """One route object: its kind, a name for messages, and (0-based line, hostname) pairs."""
+
+    kind: str
+    name: str
+    hosts: list[tuple[int, str]]
+
+
+class ListItem(NamedTuple):
+    """One `- <prefix>${SECRET_[INTERNAL_]DOMAIN}` list item, as LIST_ITEM_RE splits it."""
+
+    line: int  # 0-based
+    space: str  # whitespace between the dash and the value
+    quote: str  # '"' or ''
+    prefix: str
+    var: str  # SECRET_INTERNAL_DOMAIN or SECRET_DOMAIN
+
+
+def list_items(lines: Iterable[str]) -> Iterator[ListItem]:
+    """Yield every internal- and primary-domain list item of a file in one pass."""
+    for i, line in enumerate(lines):
+        if "${SECRET_" in line and (m := LIST_ITEM_RE.match(line)):
+            yield ListItem(i, *m.groups())
+
+
+def child(node: Any, key: str) -> Any:
+    """Return the value node under *key* of a mapping node, or None."""
+    if node is None or node.id != "mapping":
+        return None
+    for key_node, value_node in node.value:
+        if key_node.id == "scalar" and key_node.value == key:
+            return value_node
+    return None
+
+
+def items(node: Any) -> list[Any]:
+    """Return the item nodes of a sequence node (none for anything else)."""
+    return node.value if node is not None and node.id == "sequence" else []
+
+
+def scalar(node: Any) -> list[tuple[int, str]]:
+    """Return [(line, value)] for a scalar node, [] for anything else."""
+    return [(node.start_mark.line, node.value)] if node is not None and node.id == "scalar" else []
+
+
+def routes_in(text: str) -> list[Route] | None:
+    """Return every route object in a multi-document manifest, or None if it cannot be parsed.
+
+    Raises ImportError without PyYAML.
+    """
+    import yaml  # pylint: disable=import-outside-toplevel  # optional, and slow to import
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    try:
+        documents = list(yaml.compose_all(text, Loader=loader))
+    except yaml.YAMLError:
+        return None
+
+    routes: list[Route] = []
+    for doc in documents:
+        kind = next((value for _line, value in scalar(child(doc, "kind"))), "")
+        name = next((value for _line, value in scalar(child(child(doc, "metadata"), "name"))), "")
+        spec = child(doc, "spec")
+        if kind == "HTTPRoute":
+            hosts = [host for item in items(child(spec, "hostnames")) for host in scalar(item)]
+            routes.append(Route(kind, name, hosts))
+        elif kind == "Ingress":
+            hosts = [host for rule in items(child(spec, "rules")) for host in scalar(child(rule, "host"))]
+            routes.append(Route(kind, name, hosts))
+        elif kind == "HelmRelease":
+            table = child(child(spec, "values"), "route")
+            for key_node, value_node in table.value if table is not None and table.id == "mapping" else []:
+                hosts = [host for item in items(child(value_node, "hostnames")) for host in scalar(item)]
+                routes.append(Route("app-template route", f"{name}/{key_node.value}", hosts))
+    return routes
+
+
+class RouteCache:
+    """routes_in() results keyed by blob ID, persisted as JSON.
+
+    Only the entries used by the current run are written back, so the file
+    never outgrows the set of manifests that mention the internal domain.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.hits = self.misses = 0
+        self.stored: dict[str, list | None] = {}
+        self.used: dict[str, list | None] = {}
+        try:
+            stored = json.loads(pathlib.Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if isinstance(stored, dict) and stored.get("version") == CACHE_VERSION:
+            self.stored = stored["entries"]
+
+    def routes(self, blob: str, text: str) -> list[Route] | None:
+        """Return the routes of the file whose content is *text* and blob ID *blob*."""
+        if blob in self.stored:
+            self.hits += 1
+            found = self.stored[blob]
+        else:
+            try:
+                parsed = routes_in(text)
+            except ImportError:
+                return None  # not a property of the blob, so not cached
+            self.misses += 1
+            found = None if parsed is None else [[r.kind, r.name, [list(host) for host in r.hosts]] for r in parsed]
+        self.used[blob] = found
+        if found is None:
+            return None
+        return [Route(kind, name, [tuple(host) for host in hosts]) for kind, name, hosts in found]
+
+    def save(self) -> None:
+        """Write this run's entries atomically; skipped when nothing was parsed."""
+        if not self.misses and self.used.keys() == self.stored.keys():
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as handle:
+            json.dump({"version": CACHE_VERSION, "entries": self.used}, handle, separators=(",", ":"))
+        os.replace(tmp, self.path)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Keep the identifier guard warm in a background process, and talk to it.
+
+A commit-msg hook that runs check_internal_identifiers.py pays interpreter
+startup, imports and regex compilation on every commit -- far more than the
+scan of one message costs. `check_internal_identifiers.py --serve` instead
+runs serve() below: one process listening on a Unix socket (inside the git
+dir, mode 0600) that answers each request by running the guard's own main()
+in-process, so the compiled Scanner and any --cache blob results stay in
+memory between requests.
+
+This file is also the thin client. It forwards its arguments, working
+directory, stdin (for --text-file -) and INTERNAL_DOMAIN_RE to the daemon and
+replays the reply's output and exit code. A stdin over STDIN_MAX_CHARS is not
+sent: the guard runs locally and the input is streamed to it. Whenever the daemon is not there
+(or is restarting) it runs the guard locally instead, so a hook using it is
+never weaker than one calling the guard directly -- just faster when warm.
+
+The daemon reloads itself: it re-execs as soon as a request arrives after any
+of its source files changed, and the guard recompiles per INTERNAL_DOMAIN_RE
+value, so a client with a new regex is never judged by the old one. It exits
+on its own after --idle-timeout seconds without a request.
+
+Run locally:  python3 .github/scripts/check_internal_identifiers.py --serve &
+              python3 .github/scripts/scan_daemon.py --strip-git-comments --text-file MSG
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import time
+import traceback
+from collections.abc import Callable, Iterable
+
+GUARD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "check_internal_identifiers.py")
+SOCKET_NAME = "identifier-scan.sock"
+
+# Requests run the guard in-process; a full-tree scan is well under this.
+CLIENT_TIMEOUT = 300.0
+
+# A commit message or PR body is far below this; a bigger stdin is streamed to a local guard instead.
+STDIN_MAX_CHARS = 1 << 20
+
+
+def local_sources(directory: str) -> list[str]:
+    """Return the source files of every loaded module that lives in *directory* -- what the daemon must watch."""
+    modules = list(sys.modules.values())
+    files = {os.path.abspath(module.__file__) for module in modules if getattr(module, "__file__", None)}
+    return sorted(path for path in files if os.path.dirname(path) == directory and path.endswith(".py"))
+
+
+def default_socket_path() -> str:
+    """Return the daemon socket inside the git dir, so each clone gets its own."""
+    return subprocess.check_output(["git", "rev-parse", "--git-path", SOCKET_NAME], text=True).strip()
+
+
+class GuardHandler(socketserver.StreamRequestHandler):
+    """Serve one JSON request line with one JSON reply line."""
+
+    server: GuardServer
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return  # a liveness probe: connect, then hang up
+        request = json.loads(line)
+        self.wfile.write(json.dumps(self.server.answer(request)).encode() + b"\n")
+
+
+class GuardServer(socketserver.UnixStreamServer):
+    """A single-threaded daemon that runs *run(argv)* per request.
+
+    Requests are handled one at a time on purpose: each one swaps the process
+    environment, cwd and standard streams for the duration of the run.
+    """
+
+    def __init__(self, path: str, run: Callable[[list[str]], int], watched: Iterable[str]) -> None:
+        old = os.umask(0o077)
+        try:
+            super().__init__(path, GuardHandler)
+        finally:
+            os.umask(old)
+        self.run = run
+        self.mtimes = {source: os.stat(source).st_mtime_ns for source in watched}
+        self.reload = False
+        self.last_request = time.monotonic()
+
+    def stale(self) -> bool:
+        """Return True if any watched source file changed since startup."""
+        for source, mtime in self.mtimes.items():
+            try:
+                if os.stat(source).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def answer(self, request: dict) -> dict:
+        """Run one request and return the reply (or ask the client to fall back while we reload)."""
+        self.last_request = time.monotonic()
+        if self.stale():
+            self.reload = True
+            return {"status": "reload"}
+        out, err = io.StringIO(), io.StringIO()
+        saved_env, saved_cwd, saved_stdin = os.environ.get("INTERNAL_DOMAIN_RE"), os.getcwd(), sys.stdin
+        try:
+            set_env("INTERNAL_DOMAIN_RE", request.get("internal_domain_re"))
+            os.chdir(request["cwd"])
+            sys.stdin = io.StringIO(request.get("stdin") or "")
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                code = run_guarded(self.run, request["argv"])
+        finally:
+            sys.stdin = saved_stdin
+            os.chdir(saved_cwd)
+            set_env("INTERNAL_DOMAIN_RE", saved_env)
+        return {"status": "ok", "code": code, "stdout": out.getvalue(), "stderr": err.getvalue()}
+
+
+def set_env(name: str, value: str | None) -> None:
+    """Set or unset one environment variable."""
+    if value is None:
+        os.environ.pop(name, None)
+    else:
+        os.environ[name] = value
+
+
+def run_guarded(run: Callable[[list[str]], int], argv: list[str]) -> int:
+    """Run *run(argv)* the way the interpreter would: SystemExit gives the code, a crash gives 2."""
+    try:
+        return run(argv)
+    except SystemExit as exc:
+        return exc.code if isinstance(exc.code, int) else (0 if exc.code is None else 2)
+    # One bad request must not kill the daemon.
+    except Exception:  # noqa: BLE001  # pylint: disable=broad-exception-caught
+        traceback.print_exc()
+        return 2
+
+
+def serve(path: str, run: Callable[[list[str]], int], watched: Iterable[str], idle_timeout: float) -> int:
+    """Answer guard requests on the Unix socket *path* until idle or reloaded."""
+    if os.path.exists(path):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            if probe.connect_ex(path) == 0:
+                print(f"a daemon is already serving {path}", file=sys.stderr)
+                return 1
+        os.unlink(path)  # left behind by a daemon that died
+    server = GuardServer(path, run, watched)
+    server.timeout = idle_timeout
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # unwind, so the socket is removed
+    print(f"serving {path} (idle timeout {idle_timeout:.0f}s)", file=sys.stderr)
+    try:
+        with server:
+            while not server.reload and time.monotonic() - server.last_request < idle_timeout:
+                server.handle_request()
+    finally:
+        os.unlink(path)
+    if server.reload:
+        print("source changed, restarting", file=sys.stderr)
+        os.execv(sys.executable, [sys.executable, *sys.argv])
+    return 0
+
+
+def send(path: str, argv: list[str], stdin: str | None = None, timeout: float = CLIENT_TIMEOUT) -> dict | None:
+    """Send one request to the daemon at *path*; return its reply, or None if nobody answered."""
+    message = {
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "stdin": stdin,
+        "internal_domain_re": os.environ.get("INTERNAL_DOMAIN_RE"),
+    }
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(json.dumps(message).encode() + b"\n")
+            with sock.makefile("rb") as reply:
+                line = reply.readline()
+    except OSError:
+        return None
+    return json.loads(line) if line else None
+
+
+def main() -> int:
+    """Forward the guard arguments to the daemon, or run the guard locally if it cannot answer."""
+    argv = sys.argv[1:]
+    path, spawn = None, False
+    if "--socket" in argv:
+        at = argv.index("--socket")
+        path = argv[at + 1]
+        del argv[at : at + 2]
+    if "--spawn" in argv:
+        argv.remove("--spawn")
+        spawn = True
+    path = path or default_socket_path()
+
+    stdin = None
+    if "--text-file" in argv and argv[argv.index("--text-file") + 1 :][:1] == ["-"]:
+        stdin = sys.stdin.read(STDIN_MAX_CHARS + 1)
+        if len(stdin) > STDIN_MAX_CHARS:
+            return run_local(argv, stdin)
+    reply = send(path, argv, stdin)
+    if reply is not None and reply["status"] == "ok":
+        sys.stdout.write(reply["stdout"])
+        sys.stderr.write(reply["stderr"])
+        return reply["code"]
+
+    if reply is None and spawn:
+        # Detached, so the hook that started it does not wait for it.
+        subprocess.Popen(  # pylint: disable=consider-using-with  # outlives this client on purpose
+            [sys.executable, GUARD, "--serve", "--socket", path],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    return subprocess.run([sys.executable, GUARD, *argv], input=stdin, text=True, check=False).returncode
+
+
+def run_local(argv: list[str], head: str) -> int:
+    """Run the guard locally on *head* plus the rest of stdin, streamed rather than held in memory."""
+    with subprocess.Popen([sys.executable, GUARD, *argv], stdin=subprocess.PIPE, text=True) as proc:
+        pipe = proc.stdin or io.StringIO()
+        with contextlib.suppress(BrokenPipeError):
+            pipe.write(head)
+            shutil.copyfileobj(sys.stdin, pipe)
+        with contextlib.suppress(BrokenPipeError):
+            pipe.close()
+    return proc.returncode
+
+
+if __name__ == "__main__":
+    sys.exit(main())
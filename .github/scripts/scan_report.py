@@ -0,0 +1,110 @@
+"""Machine-readable reports for the identifier guard (--format json / sarif).
+
+The text output is for people reading a CI log; these documents are for the
+things around it -- code-scanning upload, dashboards, and the benchmarks that
+want to see where scan time goes. Both carry the same instrumentation block:
+wall time, bytes and files scanned, skip and cache counters, and seconds spent
+per pattern kind.
+
+Matched text is never included. Kinds in *secret_kinds* also lose their end
+column, since a span length is already a hint at the withheld value.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from collections.abc import Iterable
+from typing import NamedTuple
+
+
+class Violation(NamedTuple):
+    """One non-allowlisted identifier: file, 1-based line, kind, 0-based column span."""
+
+    path: str
+    line: int
+    kind: str
+    start: int
+    end: int
+
+    def __str__(self) -> str:
+        return f"{self.path}:{self.line}: {self.kind}"
+
+
+def build_report(
+    violations: Iterable[Violation], scope: str, stats: Counter[str], elapsed: float, secret_kinds: Iterable[str] = ()
+) -> dict:
+    """Return the --format json document: violations plus run instrumentation.
+
+    Columns are 1-based with an exclusive end, as in SARIF. Cache counters are
+    read from *stats* ("cache hits" etc.) and reported only when present.
+    """
+    secret = set(secret_kinds)
+    found = []
+    for violation in violations:
+        entry: dict[str, object] = {
+            "path": violation.path,
+            "line": violation.line,
+            "column": violation.start + 1,
+            "kind": violation.kind,
+        }
+        if violation.kind not in secret:
+            entry["end_column"] = violation.end + 1
+        found.append(entry)
+    seconds = {
+        key.removeprefix("seconds "): round(value, 6) for key, value in stats.items() if key.startswith("seconds ")
+    }
+    return {
+        "scope": scope,
+        "violations": found,
+        "instrumentation": {
+            "wall_seconds": round(elapsed, 4),
+            "files_scanned": stats["files scanned"],
+            "bytes_scanned": stats["bytes scanned"],
+            "lines_scanned": stats["lines scanned"],
+            "skipped": {kind: stats[f"skipped {kind}"] for kind in ("binary", "oversized", "generated", "bytes")},
+            "cache": (
+                {key: stats[f"cache {key}"] for key in ("hits", "misses", "entries")}
+                if any(key.startswith("cache ") for key in stats)
+                else None
+            ),
+            "pattern_seconds": dict(sorted(seconds.items(), key=lambda item: -item[1])),
+        },
+    }
+
+
+def rule_id(kind: str) -> str:
+    """Return a SARIF rule id for a pattern kind, e.g. 'device-hostname-cr'."""
+    return re.sub(r"[^a-z0-9]+", "-", kind.lower()).strip("-")
+
+
+def to_sarif(report: dict, kinds: Iterable[str]) -> dict:
+    """Wrap a build_report() document as a SARIF 2.1.0 log; instrumentation rides in run properties."""
+    results = []
+    for entry in report["violations"]:
+        region = {"startLine": entry["line"], "startColumn": entry["column"]}
+        if "end_column" in entry:
+            region["endColumn"] = entry["end_column"]
+        results.append(
+            {
+                "ruleId": rule_id(entry["kind"]),
+                "level": "error",
+                "message": {"text": f"{entry['kind']} outside the accepted-functional-config ALLOWLIST"},
+                "locations": [{"physicalLocation": {"artifactLocation": {"uri": entry["path"]}, "region": region}}],
+            }
+        )
+    rules = [
+        {"id": rule_id(kind), "name": kind, "shortDescription": {"text": f"Internal identifier: {kind}"}}
+        for kind in kinds
+    ]
+    return {
+        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "version": "2.1.0",
+        "runs": [
+            {
+                "tool": {"driver": {"name": "check_internal_identifiers", "rules": rules}},
+                "results": results,
+                "properties": {"scope": report["scope"], "instrumentation": report["instrumentation"]},
+            }
+        ],
+    }
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Run reclaim_stale_dns.py end to end against fake_opnsense.py and time it.
+
+For each table size (default 100, 400 and 2,000 records) a fresh fake
+firewall is started in-process with --latency per request and a
+--failure-rate share of 503s. Then the real script runs as a subprocess with
+APPLY=yes, once one request at a time and once with --concurrency workers
+for fetching and deleting. Each run reports wall time, the requests the fake
+served per endpoint, the records deleted and the exit code. The run fails if
+the firewall does not end up with exactly the records that should survive.
+
+The keep-list comes from a synthetic hostname inventory (HOSTNAME_INVENTORY,
+built "now" at a made-up commit the run expects) that keeps a tenth of the
+internal hostnames. The cluster-secrets source
+needs a cluster, so the subprocess replaces it with an empty one. No deletion
+rate limit is applied, so the numbers show the engine and not the throttle.
+
+A single rowCount=-1 request per size shows the truncation the paging avoids.
+
+Run locally:  python3 scripts/bench_reclaim_fake_firewall.py [--sizes 100,400,2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import fake_opnsense as fake
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+COMMIT = "0" * 40
+
+# The subprocess: the real script, with only the in-cluster keep-list source swapped out.
+RUNNER = """
+import sys, reclaim_stale_dns as r
+r.hostnames_referenced_in_secrets = set
+sys.exit(r.main())
+"""
+
+
+def write_inventory(path: str, keep: set[str]) -> None:
+    """Write a hostname inventory whose internal hostnames are *keep*."""
+    records = [{"line": n + 1, "hosts": [[host, "SECRET_INTERNAL_DOMAIN"]]} for n, host in enumerate(sorted(keep))]
+    inventory = {
+        "version": 1,
+        "commit": COMMIT,
+        "dirty": [],
+        "built_at": datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds"),
+        "files": {"kubernetes/bench.yaml": {"records": records}},
+        "internal_hostnames": sorted(keep),
+    }
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(inventory, handle)
+
+
+def survivors(table: list[dict], keep: set[str]) -> set[str]:
+    """The UUIDs that must remain: everything but unreferenced internal records with a primary twin."""
+    primary = {r["hostname"] for r in table if r["domain"] == fake.PRIMARY}
+    return {
+        r["uuid"]
+        for r in table
+        if not (r["domain"] == fake.INTERNAL and r["hostname"] in primary and r["hostname"] not in keep)
+    }
+
+
+def naive_fetch(port: int) -> str:
+    """Ask for every row at once, as the truncating client did; return what came back."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        conn.request(
+            "GET", "/api/unbound/settings/searchHostOverride?current=1&rowCount=-1", headers={"Authorization": "x"}
+        )
+        json.loads(conn.getresponse().read())
+        return "complete"
+    except (http.client.HTTPException, ValueError) as exc:
+        return f"broken ({type(exc).__name__})"
+    finally:
+        conn.close()
+
+
+def run(rows: int, concurrency: int, args: argparse.Namespace, workdir: str) -> dict:
+    """Reclaim a fresh *rows*-record fake with *concurrency* workers; return the measurements."""
+    table = fake.synthetic_table(rows)
+    internal = sorted({r["hostname"] for r in table if r["domain"] == fake.INTERNAL})
+    keep = set(random.Random(rows).sample(internal, len(internal) // 10))
+    inventory = os.path.join(workdir, f"inventory-{rows}.json")
+    write_inventory(inventory, keep)
+
+    firewall = fake.FakeOpnsense(table, args.latency, args.failure_rate)
+    server = firewall.serve()
+    env = {
+        **os.environ,
+        "OPNSENSE_HOST": f"http://127.0.0.1:{server.server_port}",
+        "OPNSENSE_API_KEY": "bench",
+        "OPNSENSE_API_SECRET": "bench",
+        "INTERNAL_DOMAIN": fake.INTERNAL,
+        "PRIMARY_DOMAIN": fake.PRIMARY,
+        "HOSTNAME_INVENTORY": inventory,
+        "HOSTNAME_INVENTORY_COMMIT": COMMIT,
+        "BACKUP_FILE": workdir,
+        "APPLY": "yes",
+        "FETCH_CONCURRENCY": str(concurrency),
+        "DELETE_CONCURRENCY": str(concurrency),
+        "DELETE_RATE": "0",
+    }
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", RUNNER], cwd=HERE, env=env, capture_output=True, text=True, check=False
+    )
+    seconds = time.perf_counter() - started
+    server.shutdown()
+    server.server_close()
+    return {
+        "rows": rows,
+        "workers": concurrency,
+        "seconds": seconds,
+        "requests": dict(firewall.requests),
+        "deleted": rows - len(firewall.rows),
+        "correct": set(firewall.rows) == survivors(table, keep),
+        "rc": proc.returncode,
+        "stderr": proc.stderr.strip().splitlines()[-1:] if proc.returncode else [],
+    }
+
+
+def main() -> int:
+    """Run every size at both concurrencies; exit 1 if any run left the wrong records or failed."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,400,2000", help="comma-separated table sizes")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake seconds per request, before jitter")
+    parser.add_argument("--failure-rate", type=float, default=0.02, help="share of requests the fake answers 503")
+    parser.add_argument("--concurrency", type=int, default=4, help="workers for the parallel run")
+    args = parser.parse_args()
+
+    print(f"latency {args.latency * 1000:.0f} ms/request, {args.failure_rate:.0%} transient failures")
+    print(f"{'ROWS':>6} {'WORKERS':>7} {'SECONDS':>8} {'SEARCH':>7} {'DELETE':>7} {'RECONF':>7} {'DELETED':>8}  RESULT")
+    failed = False
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in (int(size) for size in args.sizes.split(",")):
+            for concurrency in (1, args.concurrency):
+                r = run(rows, concurrency, args, workdir)
+                if not r["correct"]:
+                    result = "WRONG RECORDS"
+                elif r["rc"]:
+                    result = f"exit {r['rc']}"
+                else:
+                    result = "ok"
+                failed |= result != "ok"
+                counts = [r["requests"].get(f"settings/{name}HostOverride", 0) for name in ("search", "del")]
+                print(
+                    f"{rows:>6} {concurrency:>7} {r['seconds']:>8.2f} {counts[0]:>7} {counts[1]:>7} "
+                    f"{r['requests'].get('service/reconfigure', 0):>7} {r['deleted']:>8}  "
+                    f"{result} {' '.join(r['stderr'])}"
+                )
+            firewall = fake.FakeOpnsense(fake.synthetic_table(rows))
+            server = firewall.serve()
+            print(f"{rows:>6} all-rows request: {naive_fetch(server.server_port)}")
+            server.shutdown()
+            server.server_close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Benchmark reclaim_stale_dns.py's planning stage on a synthetic host-override table.
+
+Builds a table of --rows records (default 10,000) on two made-up domains, a
+keep-list covering a share of them and cluster-secrets-shaped values, then
+times:
+
+    plan       make_plan(): one pass over an index of the table
+    reference  the three list comprehensions and per-bucket sorts it replaced
+    secrets    the keep-list regex over every value at once, and per value
+
+and fails unless the plan equals the reference verdict for verdict and is
+produced within --budget seconds. Nothing touches a firewall or a cluster.
+
+Run locally:  python3 scripts/bench_reclaim_stale_dns.py [--rows 10000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import uuid
+
+INTERNAL = "home.test"
+PRIMARY = "example.test"
+
+# reclaim_stale_dns reads its configuration at import time.
+os.environ.setdefault("OPNSENSE_HOST", "https://opnsense.test")
+os.environ.setdefault("OPNSENSE_API_KEY", "bench")
+os.environ.setdefault("OPNSENSE_API_SECRET", "bench")
+os.environ["INTERNAL_DOMAIN"] = INTERNAL
+os.environ["PRIMARY_DOMAIN"] = PRIMARY
+
+import reclaim_stale_dns as rsd  # pylint: disable=wrong-import-position
+
+BUDGET_SECONDS = 1.0
+
+
+def synthetic_table(rng: random.Random, rows: int) -> tuple[list[dict], set[str], dict[str, str]]:
+    """Return (rows, keep-list, secret values): about half the hostnames have a twin, a tenth are kept."""
+    table = []
+    hostnames = [f"app{n}" for n in range(rows // 2)]
+    for hostname in hostnames:
+        domains = [INTERNAL, PRIMARY] if rng.random() < 0.5 else [rng.choice((INTERNAL, PRIMARY))]
+        for domain in domains:
+            table.append({"uuid": str(uuid.UUID(int=rng.getrandbits(128))), "hostname": hostname, "domain": domain})
+    while len(table) < rows:
+        table.append({"uuid": str(uuid.UUID(int=rng.getrandbits(128))), "hostname": "", "domain": "other.test"})
+    rng.shuffle(table)
+    keep = set(rng.sample(hostnames, len(hostnames) // 10))
+    secrets = {f"SECRET_{n}": f"{hostname}.{INTERNAL}" for n, hostname in enumerate(sorted(keep))}
+    return table, keep, secrets
+
+
+def reference_plan(rows: list[dict], keep: set[str]) -> rsd.Plan:
+    """The classification main() used before make_plan(), as a Plan."""
+    primary_hosts = {r.get("hostname") for r in rows if r.get("domain") == PRIMARY}
+    internal = [r for r in rows if r.get("domain") == INTERNAL]
+    referenced = [r for r in internal if r.get("hostname") in keep]
+    internal_only = [r for r in internal if r.get("hostname") not in primary_hosts and r.get("hostname") not in keep]
+    targets = [r for r in internal if r.get("hostname") in primary_hosts and r.get("hostname") not in keep]
+    return rsd.Plan(*(sorted(group, key=lambda r: r["hostname"]) for group in (referenced, internal_only, targets)))
+
+
+def secrets_scan(secrets: dict[str, str], repeat: int) -> tuple[float, float, bool]:
+    """Return (joined seconds, per-value seconds, whether they found the same hostnames)."""
+    pattern = re.compile(rf"([a-z0-9][a-z0-9.-]*)\.{re.escape(INTERNAL)}\b")
+    joined_seconds, joined = timed(lambda: set(pattern.findall("\n".join(secrets.values()))), repeat)
+    per_value_seconds, per_value = timed(
+        lambda: {m.group(1) for value in secrets.values() for m in pattern.finditer(value)}, repeat
+    )
+    return joined_seconds, per_value_seconds, joined == per_value
+
+
+def timed(func, repeat: int) -> tuple[float, object]:
+    """Return (best seconds of *repeat* calls, last result)."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> int:
+    """Time planning and the secrets scan; exit 1 on a verdict mismatch or a plan over budget."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="records in the synthetic table")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement; the best is reported")
+    parser.add_argument("--budget", type=float, default=BUDGET_SECONDS, help="max seconds for make_plan()")
+    args = parser.parse_args()
+
+    rows, keep, secrets = synthetic_table(random.Random(0), args.rows)
+    plan_seconds, plan = timed(lambda: rsd.make_plan(rows, keep, INTERNAL, PRIMARY), args.repeat)
+    reference_seconds, reference = timed(lambda: reference_plan(rows, keep), args.repeat)
+    joined_seconds, per_value_seconds, same = secrets_scan(secrets, args.repeat)
+
+    print(f"{args.rows} records, {len(keep)} kept hostnames, {len(secrets)} secret values")
+    print(f"  plan       {plan_seconds * 1000:8.2f} ms")
+    print(f"  reference  {reference_seconds * 1000:8.2f} ms")
+    print(f"  secrets    {joined_seconds * 1000:8.2f} ms joined, {per_value_seconds * 1000:.2f} ms per value")
+    for name, records in plan._asdict().items():
+        print(f"  {name:<10} {len(records):>6} records")
+
+    failed = False
+    if plan != reference:
+        print("MISMATCH: make_plan() and the reference classification disagree")
+        failed = True
+    if not same:
+        print("MISMATCH: the joined secrets scan found a different keep-list")
+        failed = True
+    if plan_seconds > args.budget:
+        print(f"OVER BUDGET: make_plan() took {plan_seconds:.3f} s (budget {args.budget} s)")
+        failed = True
+    if not failed:
+        print(f"OK -- identical verdicts, plan within {args.budget} s.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
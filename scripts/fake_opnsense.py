@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""A local stand-in for the OPNsense Unbound API, for exercising reclaim_stale_dns.py.
+
+Serves the four endpoints the script uses, over plain HTTP with keep-alive:
+
+    GET  /api/unbound/settings/searchHostOverride?current=N&rowCount=M[&searchPhrase=S]
+    POST /api/unbound/settings/delHostOverride/<uuid>
+    POST /api/unbound/settings/addHostOverride
+    POST /api/unbound/service/reconfigure
+
+and reproduces what makes the real one awkward:
+
+- every request takes --latency seconds (plus up to 50% jitter);
+- a search response of --truncate-at rows or more (default 421, where the
+  real firewall starts failing) is sent chunked and cut off mid-body, so the
+  client reads malformed JSON -- rowCount=-1 on a big table always hits it;
+- a --failure-rate share of requests answers 503 instead -- all but
+  service/reconfigure, which the script sends once and never resends.
+
+Requests are counted per endpoint. Any credentials are accepted, but a
+request without an Authorization header gets 401. The table is made up:
+hostnames appN on two .test domains, about half with a twin on the other one.
+
+Run locally:  python3 scripts/fake_opnsense.py --rows 400 --port 8443
+then point OPNSENSE_HOST at http://127.0.0.1:8443.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INTERNAL = "home.test"
+PRIMARY = "example.test"
+
+# The row count at which the real searchHostOverride response breaks.
+TRUNCATE_AT = 421
+
+
+def synthetic_table(rows: int, seed: int = 0) -> list[dict]:
+    """Return *rows* host overrides shaped like searchHostOverride's: about half the hostnames have a twin."""
+    rng = random.Random(seed)
+    table: list[dict] = []
+    n = 0
+    while len(table) < rows:
+        twin = rng.random() < 0.5 and len(table) + 2 <= rows
+        for domain in (INTERNAL, PRIMARY) if twin else (rng.choice((INTERNAL, PRIMARY)),):
+            table.append(
+                {
+                    "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+                    "enabled": "1",
+                    "hostname": f"app{n}",
+                    "domain": domain,
+                    "rr": "A (IPv4 address)",
+                    "server": f"198.51.100.{n % 254 + 1}",  # TEST-NET-2
+                    "description": "",
+                }
+            )
+        n += 1
+    return table
+
+
+class FakeOpnsense:
+    """The fake's state: the table, the fault settings and request counters. Thread-safe."""
+
+    def __init__(
+        self, rows: list[dict], latency: float = 0.0, failure_rate: float = 0.0, truncate_at: int = TRUNCATE_AT
+    ) -> None:
+        self.rows = {row["uuid"]: dict(row) for row in rows}
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.truncate_at = truncate_at
+        self.requests: Counter[str] = Counter()
+        self.lock = threading.Lock()
+        self.rng = random.Random(1)
+
+    def page(self, current: int, row_count: int, phrase: str = "") -> tuple[list[dict], int]:
+        """Return one page of the table in hostname order, and the total; row_count -1 is every row.
+
+        A *phrase* keeps only records with a field containing it, as the real search does.
+        """
+        with self.lock:
+            matching = [r for r in self.rows.values() if any(phrase in str(value) for value in r.values())]
+        ordered = sorted(matching, key=lambda r: (r["hostname"], r["domain"], r["uuid"]))
+        if row_count < 0:
+            return ordered, len(ordered)
+        start = (current - 1) * row_count
+        return ordered[start : start + row_count], len(ordered)
+
+    def delete(self, record_uuid: str) -> dict:
+        """Remove one record."""
+        with self.lock:
+            return {"result": "deleted" if self.rows.pop(record_uuid, None) else "not found"}
+
+    def add(self, host: dict) -> dict:
+        """Add one record under a new UUID."""
+        record_uuid = str(uuid.uuid4())
+        with self.lock:
+            self.rows[record_uuid] = {"uuid": record_uuid, **host}
+        return {"result": "saved", "uuid": record_uuid}
+
+    def delay_and_fail(self, endpoint: str) -> bool:
+        """Count a request, sleep its latency; return True if it should fail."""
+        with self.lock:
+            self.requests[endpoint] += 1
+            jitter = self.rng.random()
+            fail = self.rng.random() < self.failure_rate and endpoint != "service/reconfigure"
+        if self.latency:
+            time.sleep(self.latency * (1 + jitter / 2))
+        return fail
+
+    def serve(self, port: int = 0) -> ThreadingHTTPServer:
+        """Start serving on 127.0.0.1:*port* (0 picks a free one) in a daemon thread; return the server."""
+        server = ThreadingHTTPServer(("127.0.0.1", port), handler(self))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def handler(fake: FakeOpnsense) -> type[BaseHTTPRequestHandler]:
+    """Return a request handler class bound to *fake*."""
+
+    class Handler(BaseHTTPRequestHandler):
+        """One connection to the fake firewall."""
+
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: object) -> None:  # pylint: disable=redefined-builtin
+            """Stay quiet; the counters say what happened."""
+
+        def reply(self, status: int, payload: dict) -> None:
+            """Send *payload* as a complete JSON response."""
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def truncated(self, payload: dict) -> None:
+            """Send *payload* chunked and stop halfway, as the real firewall does past its ceiling."""
+            body = json.dumps(payload).encode()
+            body = body[: len(body) // 2]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.write(f"{len(body):x}\r\n".encode() + body + b"\r\n")
+            self.close_connection = True
+
+        def route(self) -> tuple[str, str]:
+            """Return (endpoint, argument) for the request path, e.g. ("settings/delHostOverride", uuid)."""
+            path = urllib.parse.urlsplit(self.path).path.removeprefix("/api/unbound/")
+            parts = path.split("/")
+            return "/".join(parts[:2]), "/".join(parts[2:])
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            """searchHostOverride."""
+            endpoint, _arg = self.route()
+            if not self.headers.get("Authorization"):
+                self.reply(401, {"status": 401})
+            elif fake.delay_and_fail(endpoint):
+                self.reply(503, {"status": 503})
+            elif endpoint != "settings/searchHostOverride":
+                self.reply(404, {"status": 404})
+            else:
+                query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+                current = int(query.get("current", ["1"])[0])
+                rows, total = fake.page(
+                    current, int(query.get("rowCount", ["-1"])[0]), query.get("searchPhrase", [""])[0]
+                )
+                payload = {"rows": rows, "rowCount": len(rows), "total": total, "current": current}
+                if len(rows) >= fake.truncate_at:
+                    self.truncated(payload)
+                else:
+                    self.reply(200, payload)
+
+        def do_POST(self) -> None:  # pylint: disable=invalid-name
+            """delHostOverride, addHostOverride and service/reconfigure."""
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            endpoint, arg = self.route()
+            if not self.headers.get("Authorization"):
+                self.reply(401, {"status": 401})
+            elif fake.delay_and_fail(endpoint):
+                self.reply(503, {"status": 503})
+            elif endpoint == "settings/delHostOverride":
+                self.reply(200, fake.delete(arg))
+            elif endpoint == "settings/addHostOverride":
+                self.reply(200, fake.add(json.loads(body or b"{}").get("host", {})))
+            elif endpoint == "service/reconfigure":
+                self.reply(200, {"status": "ok"})
+            else:
+                self.reply(404, {"status": 404})
+
+    return Handler
+
+
+def main() -> int:
+    """Serve a synthetic table until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--rows", type=int, default=400, help="records in the synthetic table")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per request, before jitter")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--truncate-at", type=int, default=TRUNCATE_AT, help="search rows that break the response")
+    args = parser.parse_args()
+
+    fake = FakeOpnsense(synthetic_table(args.rows), args.latency, args.failure_rate, args.truncate_at)
+    server = fake.serve(args.port)
+    print(f"serving {args.rows} records ({INTERNAL} / {PRIMARY}) on http://127.0.0.1:{server.server_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(dict(fake.requests))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -37,32 +37,136 @@ Runs in-cluster so it can read the Secret and reach the firewall:
       --image=python:3.12-slim --overrides='<see the KB entry>' -- \\
       python3 /scripts/reclaim_stale_dns.py
 
+In a pod, cluster-secrets and cluster-settings are read from the Kubernetes API
+with the pod's service-account token (it needs `get` on both in flux-system);
+without a mounted token, kubectl is used instead.
+
 Environment:
   OPNSENSE_HOST / OPNSENSE_API_KEY / OPNSENSE_API_SECRET  (from opnsense-dns-secret)
   INTERNAL_DOMAIN / PRIMARY_DOMAIN                        (bare domains, no leading dot)
   KEEP_EXTRA      optional comma-separated extra hostnames to preserve
+  HOSTNAME_INVENTORY  optional path to a hostname inventory built in a checkout
+                  (.github/scripts/hostname_inventory.py --output FILE); source 1
+                  is read from it instead of running `git grep`, so the pod
+                  needs no checkout. A missing or unreadable file is fatal, and
+                  so is one built from uncommitted changes, at any commit but
+                  HOSTNAME_INVENTORY_COMMIT (default: the checkout's HEAD; in a
+                  pod it must be set) or longer ago than
+                  HOSTNAME_INVENTORY_MAX_AGE seconds (default 86400).
   APPLY=yes       actually delete; anything else is a dry run
+  FETCH_CONCURRENCY  pages fetched at once after the first (default 4)
+  DELETE_CONCURRENCY deletions in flight at once (default 4)
+  DELETE_RATE     most deletions started per second (default 10)
+  DELETE_RETRIES  retries of a deletion after a transient error (default 3)
+  PLAN_OUT        write the reclaim plan (every record and its verdict) to this file
+  PLAN_IN         take the plan from this file, as written by a reviewed dry run
+                  with PLAN_OUT, and with APPLY=yes delete only its DELETE
+                  records. The table is still fetched and backed up and the
+                  keep-list read again first; a planned record that is gone,
+                  now names another host, is referenced or has lost its twin
+                  is dropped (and named), never anything added.
+
+  BACKUP_FILE     write the backup here (a directory gets a file named for the
+                  time and PID) instead of printing it; see BACKUP below
+
+BACKUP AND RESTORE
+------------------
+Before acting it always takes a full backup of every record (with UUIDs) --
+the only way to undo a mistake. By default that is one JSON line printed
+between BACKUP_JSON_START and BACKUP_JSON_END. With BACKUP_FILE it is instead
+streamed as gzip-compressed NDJSON, one record per line, page by page as the
+table is fetched, with a `sha256sum`-format checksum beside it (FILE.sha256);
+a backup that cannot be written aborts the run. Point it at a mounted volume
+to keep it beyond the pod.
+
+    python3 /scripts/reclaim_stale_dns.py --restore FILE
+
+checks FILE against its checksum and re-creates (addHostOverride, with the
+deletion concurrency, rate limit and retries) every backed-up record that is
+no longer on the firewall, then reconfigures once. Restored records get new
+UUIDs. An add is not idempotent, so before retrying one the firewall is
+searched for the record and the retry skipped if an earlier attempt landed;
+likewise a retried deletion answered "not found" counts as deleted. Like a
+reclaim, it is a dry run without APPLY=yes.
+
+CEILING MONITOR
+---------------
+    python3 /scripts/reclaim_stale_dns.py --metrics-port 9421
 
-It always prints a full JSON backup of every record (with UUIDs) before acting.
-Capture that output -- it is the only way to restore a mistake.
+runs until killed and serves Prometheus gauges on /metrics: total records,
+headroom to the ~421-row ceiling, records per domain and (with both domains
+set) redundant candidates -- internal records with a primary-domain twin,
+before any keep-list. Every METRICS_INTERVAL seconds (default 60) it asks
+for a one-row page, just to read the total. The full table, which the
+per-domain and candidate gauges need, is fetched only when that total moves
+or METRICS_FULL_INTERVAL seconds (default 900) have passed. Scrapes are
+answered from the last snapshot and never reach the firewall. A failed poll
+is logged and counted and the last good values are kept; alert on
+opnsense_host_overrides_poll_up or on the age of
+opnsense_host_overrides_last_success_timestamp_seconds. Nothing is deleted
+in this mode.
 """
 
+# pylint: disable=too-many-lines  # self-contained on purpose: the pod mounts this one file
+
 from __future__ import annotations
 
+import argparse
 import base64
+import datetime
+import functools
+import gzip
+import hashlib
+import http.client
 import json
 import os
 import re
 import ssl
 import subprocess
 import sys
+import threading
+import time
 import urllib.parse
-import urllib.request
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
 
 HOST = os.environ["OPNSENSE_HOST"].rstrip("/")
 INTERNAL = os.environ.get("INTERNAL_DOMAIN", "")
 PRIMARY = os.environ.get("PRIMARY_DOMAIN", "")
 APPLY = os.environ.get("APPLY") == "yes"
+FETCH_CONCURRENCY = max(1, int(os.environ.get("FETCH_CONCURRENCY", "4")))
+DELETE_CONCURRENCY = max(1, int(os.environ.get("DELETE_CONCURRENCY", "4")))
+DELETE_RATE = float(os.environ.get("DELETE_RATE", "10"))
+DELETE_RETRIES = max(0, int(os.environ.get("DELETE_RETRIES", "3")))
+INVENTORY_MAX_AGE = float(os.environ.get("HOSTNAME_INVENTORY_MAX_AGE", "86400"))
+
+# The objects whose values may hold internal hostnames: (kind, API resource, name).
+KEEP_NAMESPACE = "flux-system"
+KEEP_SOURCES = (("secret", "secrets", "cluster-secrets"), ("configmap", "configmaps", "cluster-settings"))
+SERVICE_ACCOUNT = "/var/run/secrets/kubernetes.io/serviceaccount"
+
+# Bump when the plan file's layout changes.
+PLAN_VERSION = 1
+
+# searchHostOverride fields that addHostOverride accepts back.
+RESTORE_FIELDS = ("enabled", "hostname", "domain", "rr", "mxprio", "mx", "server", "description")
+
+# First retry delay in seconds; doubled for each further attempt.
+RETRY_BACKOFF = 0.5
+
+# Rows per searchHostOverride page. Well under the ~421-row response size at
+# which OPNsense truncates; asking for everything at once is what breaks.
+PAGE_ROWS = 200
+
+API_TIMEOUT = 90
+
+# Where searchHostOverride's response starts breaking, and external-dns with it.
+CEILING = 421
+METRICS_INTERVAL = float(os.environ.get("METRICS_INTERVAL", "60"))
+METRICS_FULL_INTERVAL = float(os.environ.get("METRICS_FULL_INTERVAL", "900"))
 
 _auth = base64.b64encode(f"{os.environ['OPNSENSE_API_KEY']}:{os.environ['OPNSENSE_API_SECRET']}".encode()).decode()
 _ctx = ssl.create_default_context()
@@ -80,56 +184,601 @@ class KeepListUnavailable(RuntimeError):
     """
 
 
-def call(method: str, path: str) -> dict:
+class Plan(NamedTuple):
+    """Every internal-domain record, by verdict, each list in hostname order."""
+
+    referenced: list[dict]  # keep: a keep-list source still uses the hostname
+    no_twin: list[dict]  # keep: the hostname has no primary-domain record
+    delete: list[dict]  # redundant and unreferenced
+
+
+class ApiError(http.client.HTTPException):
+    """The API answered with an HTTP error status."""
+
+    def __init__(self, message: str, status: int) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class ApiClient:
+    """A keep-alive HTTP(S) client for one API base URL, with per-endpoint latency stats.
+
+    Connections are http.client ones kept in an idle pool: a request takes one
+    (or opens one if none is idle) and puts it back once the response is read,
+    so a run pays one TCP + TLS handshake per concurrent request rather than
+    one per call. A request that fails on a reused connection -- the firewall
+    closes idle keep-alive sockets -- is sent again on another, but a POST only
+    if it failed while being sent: once sent it may have taken effect, and
+    whether to resend is the caller's call (see settle()). A failure on a newly
+    opened connection is raised as-is. Thread-safe.
+    """
+
+    def __init__(self, base_url: str, headers: dict[str, str], context: ssl.SSLContext | None = None) -> None:
+        self.url = urllib.parse.urlsplit(base_url.rstrip("/"))
+        self.headers = headers
+        self.context = context
+        self.connects = 0
+        self.latency: dict[str, list[float]] = {}
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def _connection(self) -> tuple[http.client.HTTPConnection, bool]:
+        """Take an idle connection, or open one; return it and whether it is new."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), False
+            self.connects += 1
+        if self.url.scheme == "http":
+            conn = http.client.HTTPConnection(self.url.netloc, timeout=API_TIMEOUT)
+        else:
+            conn = http.client.HTTPSConnection(self.url.netloc, timeout=API_TIMEOUT, context=self.context)
+        return conn, True
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+        endpoint: str | None = None,
+    ) -> bytes:
+        """Send one request to *path* (relative to the base URL) and return the body; raise on HTTP >= 400.
+
+        Latency is recorded under *endpoint*, by default the path without its query.
+        """
+        endpoint = endpoint or path.split("?")[0]
+        while True:
+            conn, fresh = self._connection()
+            started, sent = time.perf_counter(), False
+            try:
+                conn.request(method, f"{self.url.path}/{path}", body=body, headers={**self.headers, **(headers or {})})
+                sent = True
+                resp = conn.getresponse()
+                data = resp.read()
+                break
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if fresh or (sent and method != "GET"):
+                    raise
+        with self._lock:
+            if not resp.will_close:
+                self._idle.append(conn)
+            self.latency.setdefault(endpoint, []).append(time.perf_counter() - started)
+        if resp.status >= 400:
+            raise ApiError(f"{method} {endpoint}: HTTP {resp.status} {resp.reason}", resp.status)
+        return data
+
+    def report(self) -> str:
+        """Summarise connections opened and per-endpoint latency (count, mean, p95, max in ms)."""
+        lines = [f"api: {sum(map(len, self.latency.values()))} requests over {self.connects} connections"]
+        for endpoint, times in sorted(self.latency.items()):
+            ordered = sorted(times)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            lines.append(
+                f"  {endpoint:<32} n={len(times):<5} mean={1000 * sum(times) / len(times):7.1f}ms "
+                f"p95={1000 * p95:7.1f}ms max={1000 * ordered[-1]:7.1f}ms"
+            )
+        return "\n".join(lines)
+
+
+api = ApiClient(f"{HOST}/api/unbound", {"Authorization": f"Basic {_auth}"}, _ctx)
+
+
+def call(method: str, path: str, payload: dict | None = None) -> dict:
     """Call the OPNsense API. Content-Type is POST-only; a GET carrying it 400s."""
-    headers = {"Authorization": f"Basic {_auth}"}
-    data = None
+    endpoint = "/".join(path.split("?")[0].split("/")[:2])  # settings/delHostOverride, not one per UUID
     if method == "POST":
-        headers["Content-Type"] = "application/json"
-        data = b"{}"
-    req = urllib.request.Request(f"{HOST}/api/unbound/{path}", method=method, data=data, headers=headers)
-    with urllib.request.urlopen(req, context=_ctx, timeout=90) as resp:
-        return json.loads(resp.read() or b"{}")
+        data = json.dumps(payload or {}).encode()
+        body = api.request(method, path, data, {"Content-Type": "application/json"}, endpoint)
+    else:
+        body = api.request(method, path, endpoint=endpoint)
+    return json.loads(body or b"{}")
+
+
+class TokenBucket:  # pylint: disable=too-few-public-methods  # a rate limiter
+    """Allow at most *rate* acquisitions per second, in bursts of up to *burst*."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a token is available and take it."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+                self.stamp = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def transient(exc: Exception) -> bool:
+    """True for errors worth retrying: the connection failed, or the firewall was busy (429, 5xx)."""
+    if isinstance(exc, ApiError):
+        return exc.status == 429 or exc.status >= 500
+    return isinstance(exc, (http.client.HTTPException, OSError))
+
+
+def settle(  # pylint: disable=too-many-arguments  # one hook per way a retry can find the work done
+    record: dict,
+    bucket: TokenBucket,
+    send: Callable[[], dict],
+    done: str,
+    ok: tuple[str, ...],
+    *,
+    retry_ok: tuple[str, ...] = (),
+    landed: Callable[[], bool] | None = None,
+) -> dict:
+    """Run one API change for *record*, retrying transient errors with exponential backoff; return its outcome.
+
+    The outcome is *done* if the API answered with a result in *ok* (or, on a
+    retry, in *retry_ok*), UNEXPECTED for any other answer and FAILED for an
+    error. An error can hide a change that did land, so before each retry
+    *landed*, if given, is asked first and a True skips the resend.
+    """
+    outcome = {"hostname": record.get("hostname"), "uuid": record.get("uuid"), "attempts": 0}
+    while True:
+        bucket.acquire()
+        outcome["attempts"] += 1
+        retry = outcome["attempts"] > 1
+        try:
+            if retry and landed is not None and landed():
+                return {**outcome, "outcome": done, "detail": "an earlier attempt landed"}
+            result = send()
+        except Exception as exc:  # pylint: disable=broad-exception-caught  # every failure must reach the table
+            if transient(exc) and outcome["attempts"] <= DELETE_RETRIES:
+                time.sleep(RETRY_BACKOFF * 2 ** (outcome["attempts"] - 1))
+                continue
+            return {**outcome, "outcome": "FAILED", "detail": f"{type(exc).__name__}: {exc}"}
+        if result.get("result") in ok:
+            return {**outcome, "outcome": done, "detail": ""}
+        if retry and result.get("result") in retry_ok:
+            return {**outcome, "outcome": done, "detail": f"{result['result']}: an earlier attempt landed"}
+        return {**outcome, "outcome": "UNEXPECTED", "detail": json.dumps(result)}
+
+
+def settle_all(records: list[dict], change: Callable[[dict, TokenBucket], dict]) -> list[dict]:
+    """Apply *change* to *records* DELETE_CONCURRENCY at a time, at most DELETE_RATE per second.
+
+    Every record gets an outcome, whatever happened to the others: nothing is
+    dropped, and this returns only once all of them have settled. Failures
+    sort first.
+    """
+    bucket = TokenBucket(DELETE_RATE, DELETE_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=DELETE_CONCURRENCY) as pool:
+        outcomes = list(pool.map(lambda record: change(record, bucket), records))
+    failed = ("FAILED", "UNEXPECTED")
+    return sorted(outcomes, key=lambda o: (o["outcome"] not in failed, str(o["hostname"] or ""), str(o["uuid"])))
+
 
+def delete_record(record: dict, bucket: TokenBucket) -> dict:
+    """Delete one host override; a retry told "not found" means an earlier attempt deleted it."""
 
-def fetch_all() -> list[dict]:
-    """Page through every host override. Never request all rows -- that is what truncates."""
-    out: list[dict] = []
-    page = 1
+    def send() -> dict:
+        # Read the UUID here, inside settle()'s guard: a record without one is a FAILED row, not a crash.
+        return call("POST", f"settings/delHostOverride/{record['uuid']}")
+
+    return settle(record, bucket, send, "deleted", ("deleted", "ok"), retry_ok=("not found",))
+
+
+def rr_type(value: object) -> str:
+    """Return the bare record type: searchHostOverride may show "A (IPv4 address)" where add wants "A"."""
+    return str(value or "").split(" ", maxsplit=1)[0]
+
+
+def restore_record(record: dict, bucket: TokenBucket) -> dict:
+    """Re-create one backed-up host override (it gets a new UUID)."""
+    host = {field: str(record[field]) for field in RESTORE_FIELDS if record.get(field) is not None}
+    if "rr" in host:
+        host["rr"] = rr_type(host["rr"])
+    send = functools.partial(call, "POST", "settings/addHostOverride", {"host": host})
+    return settle(record, bucket, send, "restored", ("saved",), landed=lambda: on_firewall(record))
+
+
+def on_firewall(record: dict) -> bool:
+    """True if the firewall has a record with *record*'s key -- so re-adding it would make a duplicate.
+
+    Searches by hostname, a page at a time like fetch_all(), rather than
+    fetching the whole table per retry.
+    """
+    page, seen, key = 1, 0, record_key(record)
     while True:
-        query = urllib.parse.urlencode({"current": page, "rowCount": 200})
-        batch = call("GET", f"settings/searchHostOverride?{query}")
-        rows = batch.get("rows") or []
-        if not rows:
-            break
-        out.extend(rows)
-        if len(out) >= batch.get("total", 0):
-            break
+        query = urllib.parse.urlencode(
+            {"current": page, "rowCount": PAGE_ROWS, "searchPhrase": str(record.get("hostname") or "")}
+        )
+        found = call("GET", f"settings/searchHostOverride?{query}")
+        rows = found.get("rows") or []
+        if any(record_key(row) == key for row in rows):
+            return True
+        seen += len(rows)
+        if not rows or seen >= int(found.get("total") or 0):
+            return False
         page += 1
-    return out
 
 
-def hostnames_referenced_in_secrets() -> set[str]:
-    """Internal-domain hostnames stored as VALUES in cluster-secrets / cluster-settings.
+def print_outcomes(outcomes: list[dict]) -> int:
+    """Print the per-record outcome table; return how many did not succeed."""
+    print(f"\n{'OUTCOME':<11} {'TRIES':>5}  {'HOSTNAME':<32} {'UUID':<36}  DETAIL")
+    for o in outcomes:
+        print(f"{o['outcome']:<11} {o['attempts']:>5}  {o['hostname']!s:<32} {o['uuid']!s:<36}  {o['detail']}")
+    return sum(o["outcome"] in ("FAILED", "UNEXPECTED") for o in outcomes)
 
-    This is the source the original cleanup missed. These never appear in Git --
-    manifests only ever contain the variable name (e.g. ${SECRET_STORAGE_SERVER}).
+
+def call_retrying(method: str, path: str) -> dict:
+    """call() an idempotent endpoint, retrying transient errors like a deletion does."""
+    attempts = 0
+    while True:
+        try:
+            return call(method, path)
+        except (http.client.HTTPException, OSError) as exc:
+            attempts += 1
+            if not transient(exc) or attempts > DELETE_RETRIES:
+                raise
+            time.sleep(RETRY_BACKOFF * 2 ** (attempts - 1))
+
+
+def reconfigure() -> dict:
+    """Apply the settled changes with one service/reconfigure.
+
+    Retried only when the connection was refused, which means the request
+    never reached the firewall. Any later error may hide a reconfigure that
+    ran, so it is raised instead of sending a second one.
     """
-    found: set[str] = set()
-    pattern = re.compile(rf"([a-z0-9][a-z0-9.-]*)\.{re.escape(INTERNAL)}\b")
-    for kind, name in (("secret", "cluster-secrets"), ("configmap", "cluster-settings")):
+    attempts = 0
+    while True:
+        try:
+            return call("POST", "service/reconfigure")
+        except ConnectionRefusedError:
+            attempts += 1
+            if attempts > DELETE_RETRIES:
+                raise
+            time.sleep(RETRY_BACKOFF * 2 ** (attempts - 1))
+
+
+def fetch_page(page: int) -> dict:
+    """Fetch one page of host overrides."""
+    query = urllib.parse.urlencode({"current": page, "rowCount": PAGE_ROWS})
+    return call_retrying("GET", f"settings/searchHostOverride?{query}")
+
+
+def fetch_all(on_page: Callable[[list[dict]], object] | None = None) -> list[dict]:
+    """Page through every host override. Never request all rows -- that is what truncates.
+
+    The first page gives the total; the rest are fetched FETCH_CONCURRENCY at a
+    time, still PAGE_ROWS each, and handed to *on_page* in order as they
+    arrive. Rows are de-duplicated by UUID (a record that moves between pages
+    mid-fetch is seen twice) and sorted by domain, hostname and UUID, so two
+    backups of the same table are byte-identical.
+    """
+    first = fetch_page(1)
+    total = int(first.get("total") or 0)
+    pages = [first]
+    if on_page:
+        on_page(first.get("rows") or [])
+    if first.get("rows") and total > PAGE_ROWS:
+        count = -(-total // PAGE_ROWS)
+        with ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY) as pool:
+            for page in pool.map(fetch_page, range(2, count + 1)):
+                pages.append(page)
+                if on_page:
+                    on_page(page.get("rows") or [])
+    by_uuid = {row.get("uuid"): row for page in pages for row in page.get("rows") or []}
+    if len(by_uuid) < total:
+        print(f"WARNING: fetched {len(by_uuid)} unique records but the firewall reports {total}", file=sys.stderr)
+    return sorted(
+        by_uuid.values(),
+        key=lambda r: (str(r.get("domain") or ""), str(r.get("hostname") or ""), str(r.get("uuid") or "")),
+    )
+
+
+def sha256_file(path: str) -> str:
+    """Return the hex SHA-256 of the file at *path*."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fetch_with_backup(target: str) -> list[dict]:
+    """fetch_all(), streaming every page into a gzip NDJSON backup at *target* and checksumming it.
+
+    The backup holds the rows exactly as fetched (a record seen on two pages
+    appears twice; --restore de-duplicates). It is written under a temporary
+    name and only moved into place, with its .sha256, once complete. A
+    directory *target* gets a file named for the second and the process ID,
+    so two runs in the same second never overwrite each other's backup.
+    """
+    if os.path.isdir(target):
+        stamp = datetime.datetime.now(datetime.UTC).strftime("%Y%m%dT%H%M%SZ")
+        target = os.path.join(target, f"host-overrides-{stamp}-{os.getpid()}.ndjson.gz")
+    tmp = f"{target}.tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as backup:
+        rows = fetch_all(lambda page: backup.writelines(json.dumps(row, sort_keys=True) + "\n" for row in page))
+    digest = sha256_file(tmp)
+    os.replace(tmp, target)
+    with open(f"{target}.sha256", "w", encoding="utf-8") as handle:
+        handle.write(f"{digest}  {os.path.basename(target)}\n")
+    print(f"backup: {target} (sha256 {digest})")
+    return rows
+
+
+def read_backup(path: str) -> list[dict]:
+    """Return the records of a BACKUP_FILE backup, de-duplicated by UUID; ValueError if its checksum is wrong."""
+    try:
+        with open(f"{path}.sha256", encoding="utf-8") as handle:
+            expected = handle.read().split()[0]
+    except (OSError, IndexError) as exc:
+        raise ValueError(f"no checksum for {path} ({path}.sha256): {exc}") from exc
+    if sha256_file(path) != expected:
+        raise ValueError(f"{path} does not match its checksum -- truncated or modified")
+    with gzip.open(path, "rt", encoding="utf-8") as backup:
+        records = {(row := json.loads(line)).get("uuid"): row for line in backup if line.strip()}
+    return list(records.values())
+
+
+def record_key(record: dict) -> tuple[str, ...]:
+    """What makes two host overrides the same record, whatever their UUIDs."""
+    hostname, domain, server = (str(record.get(field) or "") for field in ("hostname", "domain", "server"))
+    return hostname, domain, rr_type(record.get("rr")), server
+
+
+def restore(path: str) -> int:
+    """Re-create every record in the backup at *path* that the firewall no longer has."""
+    try:
+        records = read_backup(path)
+    except (OSError, ValueError, EOFError) as exc:
+        print(f"ABORT: cannot restore from {path}: {exc}")
+        return 2
+    present = {record_key(row) for row in fetch_all()}
+    missing = sorted((r for r in records if record_key(r) not in present), key=record_key)
+    print(f"backup holds {len(records)} records; {len(records) - len(missing)} still present, {len(missing)} missing")
+    print(f"  RESTORE : {len(missing)} -> {['.'.join(record_key(r)[:2]) for r in missing]}")
+    if not APPLY:
+        print("\nDRY RUN -- set APPLY=yes to restore")
+        print(api.report())
+        return 0
+
+    outcomes = settle_all(missing, restore_record)
+    fail = print_outcomes(outcomes)
+    print(f"\nrestored={len(outcomes) - fail} failed={fail}")
+    print("reconfigure:", reconfigure())
+    print(f"records now: {len(fetch_all())}")
+    print(api.report())
+    return 0 if fail == 0 else 1
+
+
+def fetch_total() -> int:
+    """Return the number of host overrides, from a one-row page."""
+    query = urllib.parse.urlencode({"current": 1, "rowCount": 1})
+    return int(call_retrying("GET", f"settings/searchHostOverride?{query}").get("total") or 0)
+
+
+def redundant_candidates(rows: list[dict]) -> int:
+    """Count internal records whose hostname also has a primary-domain record (no keep-list applied)."""
+    primary_hosts = {row.get("hostname") for row in rows if row.get("domain") == PRIMARY}
+    return sum(row.get("domain") == INTERNAL and row.get("hostname") in primary_hosts for row in rows)
+
+
+def label_value(value: str) -> str:
+    """Escape *value* for a quoted Prometheus label: backslash, double quote and newline."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_metrics(snapshot: MetricsSnapshot) -> bytes:
+    """Return the Prometheus text exposition of one snapshot; the table gauges only once a poll has succeeded."""
+    lines: list[str] = []
+
+    def emit(name: str, text: str, value: float | list[tuple[str, float]], kind: str = "gauge") -> None:
+        lines.extend([f"# HELP {name} {text}", f"# TYPE {name} {kind}"])
+        lines.extend(
+            f"{name}{labels} {sample}" for labels, sample in (value if isinstance(value, list) else [("", value)])
+        )
+
+    if snapshot.total is not None:
+        emit("opnsense_host_overrides", "Host overrides on the firewall.", snapshot.total)
+        emit("opnsense_host_overrides_headroom", "Host overrides left before the ceiling.", CEILING - snapshot.total)
+        emit(
+            "opnsense_host_overrides_by_domain",
+            "Host overrides per domain, as of the last full fetch.",
+            [(f'{{domain="{label_value(domain)}"}}', count) for domain, count in sorted(snapshot.by_domain.items())],
+        )
+    emit("opnsense_host_overrides_ceiling", "Row count at which searchHostOverride breaks.", CEILING)
+    up = 0 < snapshot.succeeded == snapshot.polled
+    emit("opnsense_host_overrides_poll_up", "1 if the last poll of the firewall succeeded.", int(up))
+    emit(
+        "opnsense_host_overrides_poll_timestamp_seconds",
+        "When the firewall was last polled.",
+        round(snapshot.polled, 3),
+    )
+    emit(
+        "opnsense_host_overrides_last_success_timestamp_seconds",
+        "When a poll of the firewall last succeeded; 0 if none has.",
+        round(snapshot.succeeded, 3),
+    )
+    emit(
+        "opnsense_host_overrides_poll_failures_total",
+        "Polls of the firewall that failed since the exporter started.",
+        snapshot.failures,
+        "counter",
+    )
+    if snapshot.candidates is not None:
+        emit(
+            "opnsense_host_overrides_redundant_candidates",
+            "Internal records with a primary-domain twin, before the keep-list.",
+            snapshot.candidates,
+        )
+    return ("\n".join(lines) + "\n").encode()
+
+
+class MetricsSnapshot:  # pylint: disable=too-many-instance-attributes  # one per exported value
+    """The latest rendered metrics, refreshed by poll() and read by every scrape."""
+
+    def __init__(self) -> None:
+        self.body = b""
+        self.total: int | None = None
+        self.by_domain: Counter[str] = Counter()
+        self.candidates: int | None = None
+        self.full_at = 0.0
+        self.polled = self.succeeded = 0.0
+        self.failures = 0
+
+    def poll(self) -> None:
+        """Read the total; refetch the whole table if it moved or the full interval passed.
+
+        Any failure is logged and counted, never raised: the exporter must keep
+        running, and a scrape then shows poll_up 0 and an aging last-success
+        timestamp beside the last good values.
+        """
+        try:
+            total = fetch_total()
+            if total != self.total or time.monotonic() - self.full_at >= METRICS_FULL_INTERVAL:
+                rows = fetch_all()
+                self.by_domain = Counter(str(row.get("domain") or "") for row in rows)
+                self.candidates = redundant_candidates(rows) if INTERNAL and PRIMARY else None
+                self.full_at = time.monotonic()
+            self.total = total
+            self.polled = self.succeeded = time.time()
+        except Exception as exc:  # pylint: disable=broad-exception-caught  # the poll thread must survive anything
+            print(f"poll failed: {type(exc).__name__}: {exc}", file=sys.stderr)
+            self.failures += 1
+            self.polled = time.time()
+        self.body = render_metrics(self)
+
+    def run(self) -> None:
+        """Sleep METRICS_INTERVAL, then poll(), forever; serve_metrics has already taken the first poll."""
+        while True:
+            time.sleep(METRICS_INTERVAL)
+            self.poll()
+
+
+def serve_metrics(port: int) -> int:
+    """Poll the firewall in the background and serve the cached snapshot on /metrics until killed."""
+    snapshot = MetricsSnapshot()
+    snapshot.poll()
+    threading.Thread(target=snapshot.run, daemon=True).start()
+
+    class Handler(BaseHTTPRequestHandler):
+        """Answer /metrics from the snapshot; everything else is 404."""
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            """Serve the snapshot."""
+            body = snapshot.body  # one reference read: a poll swaps in a whole new body
+            if self.path.split("?")[0] != "/metrics":
+                status, body = 404, b""
+            else:
+                status = 200 if body else 503  # not polled yet
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:  # pylint: disable=redefined-builtin
+            """Scrapes are not worth a log line each."""
+
+    print(f"serving host-override metrics on :{port}/metrics, polling every {METRICS_INTERVAL:g}s")
+    ThreadingHTTPServer(("", port), Handler).serve_forever()
+    return 0
+
+
+def cluster_objects_from_api() -> list[tuple[str, dict]] | None:
+    """Read the keep-list objects' data straight from the Kubernetes API, or None without a service account.
+
+    Uses the pod's mounted service-account token and CA, one pooled client and
+    both objects in flight at once -- no kubectl startup, kubeconfig or API
+    discovery. Any failure is KeepListUnavailable.
+    """
+    token_path = os.path.join(SERVICE_ACCOUNT, "token")
+    host = os.environ.get("KUBERNETES_SERVICE_HOST")
+    if not host or not os.path.exists(token_path):
+        return None
+    try:
+        with open(token_path, encoding="utf-8") as handle:
+            token = handle.read().strip()
+        context = ssl.create_default_context(cafile=os.path.join(SERVICE_ACCOUNT, "ca.crt"))
+    except OSError as exc:
+        raise KeepListUnavailable(f"cannot read the service account in {SERVICE_ACCOUNT}: {exc}") from exc
+    host = f"[{host}]" if ":" in host else host
+    port = os.environ.get("KUBERNETES_SERVICE_PORT", "443")
+    client = ApiClient(f"https://{host}:{port}/api/v1", {"Authorization": f"Bearer {token}"}, context)
+
+    def read(source: tuple[str, str, str]) -> tuple[str, dict]:
+        kind, resource, name = source
+        try:
+            obj = json.loads(client.request("GET", f"namespaces/{KEEP_NAMESPACE}/{resource}/{name}"))
+        except (http.client.HTTPException, OSError, ValueError) as exc:
+            raise KeepListUnavailable(
+                f"could not read {kind}/{name} in namespace {KEEP_NAMESPACE} from the API ({exc}). "
+                "Check the service account's RBAC."
+            ) from exc
+        return kind, obj.get("data") or {}
+
+    with ThreadPoolExecutor(max_workers=len(KEEP_SOURCES)) as pool:
+        return list(pool.map(read, KEEP_SOURCES))
+
+
+def cluster_objects_from_kubectl() -> list[tuple[str, dict]]:
+    """Read the keep-list objects' data with kubectl."""
+    found = []
+    for kind, _resource, name in KEEP_SOURCES:
         try:
             raw = subprocess.check_output(
-                ["kubectl", "get", kind, name, "-n", "flux-system", "-o", "json"],
+                ["kubectl", "get", kind, name, "-n", KEEP_NAMESPACE, "-o", "json"],
                 text=True,
                 stderr=subprocess.DEVNULL,
             )
         except (subprocess.CalledProcessError, FileNotFoundError) as exc:
             raise KeepListUnavailable(
-                f"could not read {kind}/{name} in namespace flux-system ({type(exc).__name__}). "
+                f"could not read {kind}/{name} in namespace {KEEP_NAMESPACE} ({type(exc).__name__}). "
                 "Run where kubectl is available and authorised."
             ) from exc
-        data = json.loads(raw).get("data", {}) or {}
+        found.append((kind, json.loads(raw).get("data", {}) or {}))
+    return found
+
+
+def hostnames_referenced_in_secrets() -> set[str]:
+    """Internal-domain hostnames stored as VALUES in cluster-secrets / cluster-settings.
+
+    This is the source the original cleanup missed. These never appear in Git --
+    manifests only ever contain the variable name (e.g. ${SECRET_STORAGE_SERVER}).
+    In a pod with a service account the objects are read from the API directly;
+    elsewhere with kubectl.
+    """
+    objects = cluster_objects_from_api()
+    if objects is None:
+        objects = cluster_objects_from_kubectl()
+    texts = []
+    for kind, data in objects:
         for value in data.values():
             text = str(value)
             if kind == "secret":
@@ -137,12 +786,67 @@ def hostnames_referenced_in_secrets() -> set[str]:
                     text = base64.b64decode(value).decode()
                 except Exception:  # pylint: disable=broad-exception-caught  # non-utf8 values are not hostnames
                     continue
-            found.update(m.group(1) for m in pattern.finditer(text))
-    return found
+            texts.append(text)
+    # One scan over every value; a hostname cannot span the newline between two.
+    pattern = re.compile(rf"([a-z0-9][a-z0-9.-]*)\.{re.escape(INTERNAL)}\b")
+    return set(pattern.findall("\n".join(texts)))
+
+
+def expected_inventory_commit() -> str:
+    """The commit a hostname inventory must have been built at: HOSTNAME_INVENTORY_COMMIT, else HEAD."""
+    expected = os.environ.get("HOSTNAME_INVENTORY_COMMIT", "").strip()
+    if expected:
+        return expected
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (subprocess.CalledProcessError, FileNotFoundError) as exc:
+        raise KeepListUnavailable(
+            "HOSTNAME_INVENTORY outside a checkout needs HOSTNAME_INVENTORY_COMMIT, the commit the cluster runs."
+        ) from exc
+
+
+def inventory_staleness(inventory: dict) -> str | None:
+    """Why *inventory* cannot stand for the manifests the cluster runs, or None if it can."""
+    commit, expected = str(inventory.get("commit") or ""), expected_inventory_commit()
+    if len(expected) < 7 or not commit.startswith(expected):
+        return f"it was built at {commit[:12] or 'an unknown commit'}, not {expected[:12]}"
+    if inventory.get("dirty"):
+        return f"it was built with uncommitted changes to {len(inventory['dirty'])} files"
+    try:
+        built = datetime.datetime.fromisoformat(str(inventory.get("built_at")))
+    except ValueError:
+        built = None
+    if built is None or built.tzinfo is None:
+        return "it does not say when (in UTC) it was built"
+    age = (datetime.datetime.now(datetime.UTC) - built).total_seconds()
+    if age > INVENTORY_MAX_AGE:
+        return f"it is {age / 3600:.1f} hours old (HOSTNAME_INVENTORY_MAX_AGE is {INVENTORY_MAX_AGE:g} s)"
+    return None
+
+
+def hostnames_in_inventory(path: str) -> set[str]:
+    """Internal-domain hostnames recorded in a current hostname inventory (version 1)."""
+    try:
+        with open(path, encoding="utf-8") as handle:
+            inventory = json.load(handle)
+    except (OSError, ValueError) as exc:
+        raise KeepListUnavailable(f"cannot read HOSTNAME_INVENTORY {path}: {exc}") from exc
+    if not isinstance(inventory, dict) or inventory.get("version") != 1 or "internal_hostnames" not in inventory:
+        raise KeepListUnavailable(
+            f"HOSTNAME_INVENTORY {path} is not a version 1 hostname inventory with internal_hostnames. Rebuild it."
+        )
+    stale = inventory_staleness(inventory)
+    if stale:
+        raise KeepListUnavailable(f"HOSTNAME_INVENTORY {path} is stale: {stale}. Rebuild it.")
+    print(f"git keep-list from the hostname inventory built at {inventory['commit'][:12]}")
+    return set(inventory["internal_hostnames"])
 
 
 def hostnames_referenced_in_git() -> set[str]:
     """Internal-domain hostnames written literally into tracked manifests."""
+    inventory = os.environ.get("HOSTNAME_INVENTORY")
+    if inventory:
+        return hostnames_in_inventory(inventory)
     try:
         raw = subprocess.check_output(
             ["git", "grep", "-hoE", r"[a-z0-9][a-z0-9.-]*\.\$\{SECRET_INTERNAL_DOMAIN\}", "--", "kubernetes/"],
@@ -159,40 +863,153 @@ def hostnames_referenced_in_git() -> set[str]:
     return {line.split(".${")[0] for line in raw.split() if line}
 
 
-def main() -> int:
-    """Classify every internal-domain record and delete only the provably redundant ones."""
-    if not INTERNAL or not PRIMARY:
-        print("ABORT: set INTERNAL_DOMAIN and PRIMARY_DOMAIN")
-        return 2
+def make_plan(rows: list[dict], keep: set[str], internal: str, primary: str) -> Plan:
+    """Classify every *internal* record in one pass over an index of the table.
+
+    A record is deleted only if its hostname also exists on *primary* and is in
+    none of the keep-list sources.
+    """
+    primary_hosts: set[str] = set()
+    internal_by_host: dict[str, list[dict]] = {}
+    for row in rows:
+        domain, hostname = row.get("domain"), str(row.get("hostname") or "")
+        if domain == primary:
+            primary_hosts.add(hostname)
+        elif domain == internal:
+            internal_by_host.setdefault(hostname, []).append(row)
+    plan = Plan([], [], [])
+    for hostname, records in sorted(internal_by_host.items()):
+        if hostname in keep:
+            plan.referenced.extend(records)
+        elif hostname in primary_hosts:
+            plan.delete.extend(records)
+        else:
+            plan.no_twin.extend(records)
+    return plan
+
+
+def write_plan(plan: Plan, path: str) -> None:
+    """Write *plan* to *path* atomically, with what it was computed against."""
+    document = {
+        "version": PLAN_VERSION,
+        "host": HOST,
+        "internal": INTERNAL,
+        "primary": PRIMARY,
+        "created_at": datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds"),
+        **plan._asdict(),
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as handle:
+        json.dump(document, handle, indent=1)
+    os.replace(tmp, path)
+
+
+def read_plan(path: str) -> Plan:
+    """Return the plan at *path*; ValueError if it is not one for this firewall and these domains."""
+    with open(path, encoding="utf-8") as handle:
+        document = json.load(handle)
+    if not isinstance(document, dict) or document.get("version") != PLAN_VERSION:
+        raise ValueError(f"{path} is not a version {PLAN_VERSION} reclaim plan")
+    made_for = (document.get("host"), document.get("internal"), document.get("primary"))
+    if made_for != (HOST, INTERNAL, PRIMARY):
+        raise ValueError(f"{path} was planned for {made_for}, not this firewall and these domains")
+    print(f"plan from {path}, created {document.get('created_at')}")
+    return Plan(*(document[field] for field in Plan._fields))
+
 
-    rows = fetch_all()
+def plan_from_file(path: str) -> Plan | None:
+    """read_plan(), or None (having said why) if *path* cannot be used."""
+    try:
+        return read_plan(path)
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        print(f"ABORT: cannot use PLAN_IN: {exc}")
+        return None
+
+
+def confirm_plan(reviewed: Plan, current: Plan, rows: list[dict]) -> Plan:
+    """Narrow a *reviewed* plan's deletions to those the *current* table and keep-list still allow.
+
+    A planned record is kept only if its UUID is still on the firewall with
+    the same hostname and domain and the current plan would delete it too.
+    Records the current plan would delete but the reviewed one does not are
+    left alone.
+    """
+    by_uuid = {row.get("uuid"): row for row in rows}
+    deletable = {record.get("uuid") for record in current.delete}
+    referenced = {record.get("hostname") for record in current.referenced}
+    confirmed = []
+    for record in reviewed.delete:
+        now = by_uuid.get(record.get("uuid"))
+        if now is None:
+            reason = "no longer on the firewall"
+        elif (now.get("hostname"), now.get("domain")) != (record.get("hostname"), record.get("domain")):
+            reason = f"now {now.get('hostname')}.{now.get('domain')}"
+        elif record.get("uuid") not in deletable:
+            reason = "now referenced" if record.get("hostname") in referenced else "no primary-domain twin any more"
+        else:
+            confirmed.append(now)
+            continue
+        print(f"  dropped from the plan: {record.get('hostname')} {record.get('uuid')} ({reason})")
+    print(f"plan confirmed against the firewall: {len(confirmed)} of {len(reviewed.delete)} deletions still apply")
+    return Plan(current.referenced, current.no_twin, confirmed)
+
+
+def plan_from_firewall(reviewed: Plan | None = None) -> Plan | None:
+    """Fetch and back up the table, build the keep-list and classify; None if either fails.
+
+    With a *reviewed* plan (PLAN_IN), the result deletes only what it did and
+    the current state still allows; see confirm_plan().
+    """
+    backup = os.environ.get("BACKUP_FILE")
+    if backup:
+        try:
+            rows = fetch_with_backup(backup)
+        except OSError as exc:
+            print(f"ABORT: cannot write the backup to {backup}: {exc}")
+            return None
+    else:
+        rows = fetch_all()
     print(f"fetched {len(rows)} records")
-    print("BACKUP_JSON_START")
-    print(json.dumps(rows))
-    print("BACKUP_JSON_END")
+    if not backup:
+        print("BACKUP_JSON_START")
+        print(json.dumps(rows))
+        print("BACKUP_JSON_END")
 
     try:
         keep = hostnames_referenced_in_secrets() | hostnames_referenced_in_git()
     except KeepListUnavailable as exc:
         print(f"\nABORT: {exc}")
         print("Refusing to continue with an incomplete keep-list -- that is how the NFS outage happened.")
-        return 2
+        return None
     keep |= {h.strip() for h in os.environ.get("KEEP_EXTRA", "").split(",") if h.strip()}
     print(f"\nkeep-list ({len(keep)} hostnames still referenced): {sorted(keep)}")
+    plan = make_plan(rows, keep, INTERNAL, PRIMARY)
+    return plan if reviewed is None else confirm_plan(reviewed, plan, rows)
+
 
-    primary_hosts = {r.get("hostname") for r in rows if r.get("domain") == PRIMARY}
-    internal = [r for r in rows if r.get("domain") == INTERNAL]
+def reclaim() -> int:
+    """Classify every internal-domain record and delete only the provably redundant ones."""
+    if not INTERNAL or not PRIMARY:
+        print("ABORT: set INTERNAL_DOMAIN and PRIMARY_DOMAIN")
+        return 2
 
-    referenced = [r for r in internal if r.get("hostname") in keep]
-    internal_only = [r for r in internal if r.get("hostname") not in primary_hosts and r.get("hostname") not in keep]
-    targets = [r for r in internal if r.get("hostname") in primary_hosts and r.get("hostname") not in keep]
+    reviewed = None
+    if os.environ.get("PLAN_IN"):
+        reviewed = plan_from_file(os.environ["PLAN_IN"])
+        if reviewed is None:
+            return 2
+    plan = plan_from_firewall(reviewed)
+    if plan is None:
+        return 2
+    targets = plan.delete
 
-    print(f"\n{INTERNAL} records : {len(internal)}")
-    print(f"  keep (referenced)  : {len(referenced)} -> {sorted(str(r.get('hostname') or '') for r in referenced)}")
-    print(
-        f"  keep (no twin)     : {len(internal_only)} -> {sorted(str(r.get('hostname') or '') for r in internal_only)}"
-    )
-    print(f"  DELETE (redundant) : {len(targets)} -> {sorted(str(r.get('hostname') or '') for r in targets)}")
+    print(f"\n{INTERNAL} records : {len(plan.referenced) + len(plan.no_twin) + len(targets)}")
+    for label, records in (("keep (referenced) ", plan.referenced), ("keep (no twin)    ", plan.no_twin)):
+        print(f"  {label} : {len(records)} -> {[str(r.get('hostname') or '') for r in records]}")
+    print(f"  DELETE (redundant) : {len(targets)} -> {[str(r.get('hostname') or '') for r in targets]}")
+    if os.environ.get("PLAN_OUT"):
+        write_plan(plan, os.environ["PLAN_OUT"])
+        print(f"plan written to {os.environ['PLAN_OUT']}")
 
     expected = os.environ.get("EXPECTED")
     if expected and len(targets) != int(expected):
@@ -201,26 +1018,33 @@ def main() -> int:
 
     if not APPLY:
         print("\nDRY RUN -- set APPLY=yes to delete")
+        print(api.report())
         return 0
 
-    ok = fail = 0
-    for record in targets:
-        try:
-            result = call("POST", f"settings/delHostOverride/{record['uuid']}")
-            if result.get("result") in ("deleted", "ok"):
-                ok += 1
-            else:
-                fail += 1
-                print(f"  unexpected result for {record.get('hostname')}: {result}")
-        except Exception as exc:  # pylint: disable=broad-exception-caught  # continue; partial success is recoverable
-            fail += 1
-            print(f"  FAILED {record.get('hostname')}: {exc}")
-
-    print(f"\ndeleted={ok} failed={fail}")
-    print("reconfigure:", call("POST", "service/reconfigure"))
+    # Partial success is recoverable: every record is attempted and reported,
+    # failures first, and the service is reconfigured once they have all settled.
+    outcomes = settle_all(targets, delete_record)
+    fail = print_outcomes(outcomes)
+
+    print(f"\ndeleted={len(outcomes) - fail} failed={fail}")
+    print("reconfigure:", reconfigure())
     print(f"records now: {len(fetch_all())}")
+    print(api.report())
     return 0 if fail == 0 else 1
 
 
+def main() -> int:
+    """Reclaim, restore or monitor, as the command line says."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--restore", metavar="FILE", help="re-create the records of a BACKUP_FILE backup")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT", help="serve ceiling metrics until killed")
+    args = parser.parse_args()
+    if args.restore:
+        return restore(args.restore)
+    if args.metrics_port is not None:
+        return serve_metrics(args.metrics_port)
+    return reclaim()
+
+
 if __name__ == "__main__":
     sys.exit(main())